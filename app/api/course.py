@@ -1,7 +1,7 @@
 # app/endpoints/course.py
 
 import asyncio
-import os
+import json
 import uuid
 
 from fastapi import (
@@ -12,20 +12,20 @@ from fastapi import (
     Response,
     UploadFile,
 )
-from sqlalchemy import delete, func, select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.testing.assertsql import CountStatements
 
 from app.core.auth import get_current_user
 from app.core.settings import Settings
-from app.db.session import get_session
-from app.models.answer_option import AnswerOption
+from app.core.user_cache import UserSnapshot
+from app.db.queries import get_quizzes_for_you
+from app.db.session import async_session, get_read_session, get_session
 from app.models.course import Course
 from app.models.course_member import CourseMember
 from app.models.file import File as CourseFile
 from app.models.quiz import Quiz
-from app.models.quiz_attempt import QuizAttempt
-from app.models.quiz_attempt_answer import QuizAttemptAnswer
 from app.models.user import User
 from app.schemas.course import (
     CourseCreate,
@@ -40,8 +40,14 @@ from app.schemas.course import (
     UserList,
     UserOut,
 )
-from app.schemas.file import FileOut, RemoveFileRequest
-from app.services.llm_client import save_pdf_to_db
+from app.schemas.file import FileOut, FileStatusOut, RemoveFileRequest
+from app.services.ingestion import (
+    DONE as INGESTION_DONE,
+    FAILED as INGESTION_FAILED,
+    PENDING as INGESTION_PENDING,
+    UploadTooLarge,
+    ingestion_pipeline,
+)
 
 
 router = APIRouter(prefix="/course")
@@ -50,7 +56,7 @@ router = APIRouter(prefix="/course")
 @router.get("/your", response_model=CourseList)
 async def list_your_courses(
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     result = await session.execute(
         select(Course).where(Course.id_user == current_user.id_user)
@@ -63,7 +69,7 @@ async def list_your_courses(
 async def create_course(
     payload: CourseCreate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     course = Course(
         title=payload.title,
@@ -80,7 +86,7 @@ async def create_course(
 async def get_course_with_quizzes(
     id_course: int,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     course_row = await session.execute(
         select(Course).where(
@@ -104,7 +110,7 @@ async def get_course_with_quizzes(
 async def list_course_members(
     id_course: int,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     # only course owner can list members
     owner_check = await session.execute(
@@ -131,7 +137,7 @@ async def delete_course_member(
     id_course: int,
     payload: RemoveUserRequest,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     # only course owner can delete members
     owner_check = await session.execute(
@@ -158,7 +164,7 @@ async def invite_course_member(
     id_course: int,
     payload: InviteUserRequest,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     # only course owner may invite members
     owner = await session.execute(
@@ -196,7 +202,7 @@ async def invite_course_member(
 
 @router.get("/for_you", response_model=CourseList)
 async def list_for_you_courses(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user = Depends(get_current_user),
 ):
     """
@@ -214,75 +220,36 @@ async def list_for_you_courses(
 @router.get("/{id_course}/for_you", response_model=CourseForYouDetail)
 async def get_course_for_you(
     id_course: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user=Depends(get_current_user),
 ):
-    # fetch course
-    course_obj = await session.get(Course, id_course)
-    if course_obj is None:
-        raise HTTPException(status_code=404, detail="Course not found")
-
-    # membership check
-    membership = await session.execute(
-        select(CourseMember.id_course_member).where(
-            CourseMember.id_course == id_course,
-            CourseMember.id_user == current_user.id_user,
+    # fetch course together with the membership check
+    course_row = await session.execute(
+        select(Course, CourseMember.id_course_member)
+        .outerjoin(
+            CourseMember,
+            and_(
+                CourseMember.id_course == Course.id_course,
+                CourseMember.id_user == current_user.id_user,
+            ),
         )
+        .where(Course.id_course == id_course)
+        .limit(1)
     )
-    if membership.scalar_one_or_none() is None:
+    course_row = course_row.one_or_none()
+    if course_row is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    course_obj, id_course_member = course_row
+    if id_course_member is None:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    # fetch quizzes
-    quiz_res = await session.execute(
-        select(Quiz).where(Quiz.id_course == id_course)
-    )
-    quizzes = quiz_res.scalars().all()
+    # quizzes with the latest attempt's stored score, in a single query
+    rows = await get_quizzes_for_you(session, id_course, current_user.id_user)
 
     quiz_outputs: list[QuizForYouOut] = []
-    for quiz in quizzes:
-        # latest attempt
-        attempt_res = await session.execute(
-            select(QuizAttempt)
-            .where(
-                QuizAttempt.id_quiz == quiz.id_quiz,
-                QuizAttempt.id_user == current_user.id_user,
-            )
-            .order_by(QuizAttempt.attempt_date.desc())
-            .limit(1)
-        )
-        attempt = attempt_res.scalar_one_or_none()
-
+    for quiz, id_quiz_attempt, correct_ratio in rows:
         # "is_complete" is true if any attempt exists
-        is_complete = attempt is not None
-
-        # compute correct_ratio only if an attempt exists
-        if attempt:
-            # count total answers in this attempt
-            total_res = await session.execute(
-                select(func.count())
-                .select_from(QuizAttemptAnswer)
-                .where(QuizAttemptAnswer.id_quiz_attempt == attempt.id_quiz_attempt)
-            )
-            total = total_res.scalar_one() or 0
-
-            # count correct answers via join to AnswerOption
-            correct_res = await session.execute(
-                select(func.count())
-                .select_from(QuizAttemptAnswer)
-                .join(
-                    AnswerOption,
-                    AnswerOption.id_answer_option == QuizAttemptAnswer.id_answer_option
-                )
-                .where(
-                    QuizAttemptAnswer.id_quiz_attempt == attempt.id_quiz_attempt,
-                    AnswerOption.is_correct == True
-                )
-            )
-            correct = correct_res.scalar_one() or 0
-
-            correct_ratio = (correct / total) if total > 0 else 0.0
-        else:
-            correct_ratio = None
+        is_complete = id_quiz_attempt is not None
 
         quiz_outputs.append(
             QuizForYouOut(
@@ -300,7 +267,7 @@ async def get_course_for_you(
 
 @router.post(
     "/{course_id}/add_file",
-    status_code=201,
+    status_code=202,
     summary="Upload a PDF file and attach it to a course",
 )
 async def add_file_to_course(
@@ -309,6 +276,11 @@ async def add_file_to_course(
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
+    """
+    Stores the upload and queues it for ingestion; follow progress through
+    `/{course_id}/file/{id_file}/status`. Uploading a file under a name the
+    course already has replaces it, re-embedding only what changed.
+    """
     # 1. Verify ownership
     course_obj = await session.get(Course, course_id)
     if course_obj is None:
@@ -323,28 +295,139 @@ async def add_file_to_course(
             detail="Only PDF uploads are allowed"
         )
 
-    # 3. Save file to disk
-    upload_dir = os.path.join("uploads", f"course_{course_id}")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    # use uuid to avoid collisions
-    filename = f"{upload.filename}"
-    # path = os.path.join(upload_dir, filename)
-    # contents = await upload.read()
-    # with open(path, "wb") as f:
-    #     f.write(contents)
-
-    # 4. Record in DB
-    file_rec = CourseFile(
-        file_name=filename,
-        id_course=course_id
-    )
-    session.add(file_rec)
+    # 3. Stream file to disk; use uuid to avoid collisions
+    path = str(Settings.uploads_path / f"course_{course_id}" / f"{uuid.uuid4().hex}.pdf")
+    try:
+        content_hash = await ingestion_pipeline.save_upload(upload, path)
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=exc.detail)
+
+    # 4. A file of the same name is a new version of it
+    existing = (await session.execute(
+        select(CourseFile)
+        .where(
+            CourseFile.id_course == course_id,
+            CourseFile.file_name == upload.filename,
+        )
+        .order_by(CourseFile.id_file.desc())
+        .limit(1)
+        .with_for_update()
+    )).scalar_one_or_none()
+
+    replaced_path = None
+    if existing is None:
+        file_rec = CourseFile(
+            file_name=upload.filename,
+            id_course=course_id,
+            stored_path=path,
+            content_hash=content_hash,
+            status=INGESTION_PENDING,
+        )
+        session.add(file_rec)
+    elif ingestion_pipeline.is_active(existing):
+        await session.rollback()
+        await ingestion_pipeline.remove_upload(path)
+        raise HTTPException(
+            status_code=409, detail="The previous version is still being ingested"
+        )
+    elif existing.content_hash == content_hash and existing.status == INGESTION_DONE:
+        # rollback expires `existing` as commit would
+        id_file, status = existing.id_file, existing.status
+        await session.rollback()
+        await ingestion_pipeline.remove_upload(path)
+        return {"msg": "unchanged", "id_file": id_file, "status": status}
+    else:
+        # chunks of the previous version are diffed against this one
+        file_rec = existing
+        replaced_path = file_rec.stored_path
+        file_rec.stored_path = path
+        file_rec.content_hash = content_hash
+        file_rec.status = INGESTION_PENDING
+        file_rec.pages_total = None
+        file_rec.pages_done = 0
+        file_rec.chunks_done = 0
+        file_rec.error = None
+
+    # 5. Record in DB, then hand over to the pipeline. Commit expires the
+    # instance, and reloading it lazily is not possible under asyncio
+    await session.flush()
+    id_file, status = file_rec.id_file, file_rec.status
     await session.commit()
-    # save_pdf_to_db(pdf_path=file_path, file_name=safe_name, collection_name=collection_name)
-    await asyncio.sleep(3)
+    ingestion_pipeline.submit(id_file)
+    await ingestion_pipeline.remove_upload(replaced_path)
 
-    return {"msg": "ok"}
+    return {"msg": "ok", "id_file": id_file, "status": status}
+
+
+async def _get_owned_file(
+    session: AsyncSession, course_id: int, id_file: int, id_user: int
+) -> CourseFile:
+    row = await session.execute(
+        select(CourseFile, Course.id_user)
+        .join(Course, Course.id_course == CourseFile.id_course)
+        .where(CourseFile.id_file == id_file, CourseFile.id_course == course_id)
+    )
+    row = row.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="File not found in this course")
+    file_rec, id_owner = row
+    if id_owner != id_user:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return file_rec
+
+
+@router.get(
+    "/{course_id}/file/{id_file}/status",
+    response_model=FileStatusOut,
+    summary="Ingestion progress of an uploaded file",
+)
+async def get_course_file_status(
+    course_id: int,
+    id_file: int,
+    session: AsyncSession = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    return await _get_owned_file(session, course_id, id_file, current_user.id_user)
+
+
+@router.get(
+    "/{course_id}/file/{id_file}/status/stream",
+    summary="Stream ingestion progress as SSE",
+)
+async def stream_course_file_status(
+    course_id: int,
+    id_file: int,
+    session: AsyncSession = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    """
+    Emits a `progress` event whenever the file's status changes and closes
+    the stream once ingestion is done or failed.
+    """
+    await _get_owned_file(session, course_id, id_file, current_user.id_user)
+    # don't hold the request's connection for the lifetime of the stream
+    await session.close()
+
+    async def event_generator():
+        last = None
+        while True:
+            async with async_session() as poll_session:
+                file_rec = await poll_session.get(CourseFile, id_file)
+            if file_rec is None:
+                return
+            status = FileStatusOut.model_validate(file_rec).model_dump()
+            if status != last:
+                last = status
+                yield f"event: progress\ndata: {json.dumps(status)}\n\n"
+            if file_rec.status in (INGESTION_DONE, INGESTION_FAILED):
+                return
+            await asyncio.sleep(Settings.ingestion_status_interval)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get(
@@ -399,11 +482,22 @@ async def delete_course_file(
     file_rec = res.scalar_one_or_none()
     if file_rec is None:
         raise HTTPException(status_code=404, detail="File not found in this course")
+    if ingestion_pipeline.is_active(file_rec):
+        raise HTTPException(status_code=409, detail="The file is still being ingested")
+    stored_path = file_rec.stored_path
 
-    # delete the DB record
+    # delete the DB record (its chunk records cascade)
     await session.execute(
         delete(CourseFile).where(CourseFile.id_file == payload.id_file)
     )
+    remaining = (await session.execute(
+        select(CourseFile.id_file).where(CourseFile.id_course == course_id).limit(1)
+    )).first()
     await session.commit()
 
+    # then its vectors, and the whole collection with the course's last file
+    await ingestion_pipeline.discard_file(
+        course_id, payload.id_file, stored_path, drop_collection=remaining is None
+    )
+
     return {"msg": "ok"}
\ No newline at end of file
@@ -1,28 +1,33 @@
-from fastapi import APIRouter, Depends
+import json
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from app.models.course import Course
+from app.models.course_member import CourseMember
 from app.schemas.llm import MutationPayload, LLMResponse
-from app.services.llm_client import send_to_llm
+from app.services.llm_client import send_to_llm, stream_from_llm
 from app.services.prompts import generate_quiz_help_prompt
+from app.services.vector_store import course_collection_name
 from app.core.auth import get_current_user
 from app.db.session import get_session
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix='/llm')
 
-@router.post("/get", response_model=LLMResponse)
-async def get_llm_response(
-    payload: MutationPayload,
-    _: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_session)
-):
+
+def build_messages(payload: MutationPayload) -> list[dict[str, str]]:
     system_prompt = generate_quiz_help_prompt(payload)
 
     from_response_to_gpt = {
         'user': 'user',
         'bot': 'assistant'
     }
-    id_ = 10
 
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         *[
             {"role": from_response_to_gpt[msg.from_], "content": msg.text}
@@ -30,8 +35,77 @@ async def get_llm_response(
         ],
         {"role": "user", "content": payload.user_message}
     ]
-    collection_name = f'collection{id_}'
 
-    response_text = send_to_llm(messages, collection_name)
 
-    return {"text": response_text}
\ No newline at end of file
+async def resolve_collection(
+    session: AsyncSession, id_course: int | None, id_user: int
+) -> str | None:
+    """
+    Collection to retrieve from for `id_course`, once the user is known to
+    own or belong to the course.
+    """
+    if id_course is None:
+        return None
+    owner_q = select(Course.id_course).where(
+        Course.id_course == id_course, Course.id_user == id_user
+    )
+    member_q = select(CourseMember.id_course).where(
+        CourseMember.id_course == id_course, CourseMember.id_user == id_user
+    )
+    allowed = (await session.execute(owner_q.union(member_q))).first()
+    if allowed is None:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return course_collection_name(id_course)
+
+
+@router.post("/get", response_model=LLMResponse)
+async def get_llm_response(
+    payload: MutationPayload,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session)
+):
+    collection_name = await resolve_collection(
+        db, payload.id_course, current_user.id_user
+    )
+    messages = build_messages(payload)
+
+    response_text = await send_to_llm(messages, collection_name, payload.retrieval)
+
+    return {"text": response_text}
+
+
+@router.post("/get/stream", summary="Stream the assistant answer as SSE")
+async def stream_llm_response(
+    payload: MutationPayload,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Emits `token` events with text deltas as the model produces them and a
+    final `done` event with token usage and timings. An answer that fails
+    midway ends with an `error` event instead; only `done` means complete.
+    """
+    collection_name = await resolve_collection(
+        db, payload.id_course, current_user.id_user
+    )
+    # the session is not needed while the answer streams
+    await db.close()
+    messages = build_messages(payload)
+
+    async def event_generator():
+        try:
+            async for event, data in stream_from_llm(
+                messages, collection_name, payload.retrieval
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception:
+            # headers are sent already; tell the client the answer is cut off
+            logger.exception("Streaming LLM answer failed")
+            data = {"detail": "The answer could not be completed"}
+            yield f"event: error\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,90 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import metrics
+from app.db.session import pool_metrics, replica_monitor, replica_pool_metrics
+from app.services.embeddings import embedding_batcher
+from app.services.feedback_queue import feedback_queue
+from app.services.ingestion import ingestion_pipeline
+from app.services.sse_broker import sse_broker
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ─── State the services already keep, read at scrape time ────────────────────
+
+def _pools() -> dict:
+    pools = {"primary": pool_metrics}
+    if replica_pool_metrics is not None:
+        pools["replica"] = replica_pool_metrics
+    return pools
+
+
+def _pool_stat(name: str):
+    return lambda: {
+        (database,): stats.stats().get(name) for database, stats in _pools().items()
+    }
+
+
+metrics.gauge_callback(
+    "db_pool_checked_out", "Connections currently checked out",
+    _pool_stat("checked_out"), ["database"],
+)
+metrics.gauge_callback(
+    "db_pool_size", "Configured pool size",
+    _pool_stat("size"), ["database"],
+)
+metrics.counter_callback(
+    "db_pool_timeouts_total", "Checkouts that gave up waiting for a connection",
+    _pool_stat("timeouts"), ["database"],
+)
+metrics.histogram_view(
+    "db_pool_wait_seconds", "Time the primary pool made a checkout wait",
+    lambda: pool_metrics.wait_seconds,
+)
+metrics.gauge_callback(
+    "db_replica_lag_seconds", "Replication lag at the last check",
+    lambda: replica_monitor.stats().get("lag_seconds") if replica_monitor else None,
+)
+
+metrics.gauge_callback(
+    "embedding_batcher_queued", "Query embeddings waiting for a batch",
+    lambda: embedding_batcher.stats()["queued"],
+)
+
+metrics.counter_callback(
+    "feedback_jobs_total", "Feedback jobs finished by this process, by outcome",
+    lambda: {
+        ("completed",): feedback_queue.completed,
+        ("failed",): feedback_queue.failed,
+        ("retried",): feedback_queue.retried,
+    },
+    ["result"],
+)
+metrics.gauge_callback(
+    "feedback_busy_workers", "Feedback workers currently running a job",
+    lambda: feedback_queue.busy_workers,
+)
+metrics.gauge_callback(
+    "ingestion_queued_files", "Files being ingested or waiting for a slot",
+    lambda: ingestion_pipeline.queued_files,
+)
+
+metrics.gauge_callback(
+    "sse_connections", "Open quiz result streams",
+    lambda: sse_broker.total_connections,
+)
+metrics.gauge_callback(
+    "sse_connected_users", "Users with at least one open result stream",
+    lambda: sse_broker.connected_users,
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus text exposition of this worker's metrics.
+    """
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
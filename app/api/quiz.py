@@ -1,16 +1,13 @@
 # app/endpoints/quiz.py
 
-import asyncio
-import json
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
-from app.db.session import get_session
+from app.db.session import get_read_session, get_session
 from app.models.answer_option import AnswerOption
 from app.models.course import Course
 from app.models.course_member import CourseMember
@@ -18,25 +15,113 @@ from app.models.question import Question
 from app.models.quiz import Quiz
 from app.models.quiz_attempt import QuizAttempt
 from app.models.quiz_attempt_answer import QuizAttemptAnswer
-from app.models.handle_quiz_attempt import HandleQuizAttempt
 from app.schemas.course import QuizOut
 from app.schemas.quiz import (
     AnswerOptionDo,
     AnswerOptionResult,
     QuestionDo,
     QuestionResult,
+    QuizBulkCreate,
+    QuizBulkOut,
     QuizCreate,
     QuizDoOut,
     QuizResultsOut,
     QuizSubmitRequest,
     QuizSubmitResponse,
 )
-from app.services.llm_client import send_to_llm
+from app.services.feedback_queue import feedback_queue
 from app.services.prompts import generate_feedback_prompt
+from app.services.quiz_cache import quiz_content_cache
+from app.services.scoring import grade_attempt
 
 
 router = APIRouter(prefix="/quiz", tags=["quiz"])
 
+async def _ensure_can_author(
+    session: AsyncSession, id_user: int, course_ids: set[int]
+) -> None:
+    """
+    User must be owner or member of every course in `course_ids`.
+    """
+    owner_q = select(Course.id_course).where(
+        Course.id_course.in_(course_ids),
+        Course.id_user == id_user,
+    )
+    member_q = select(CourseMember.id_course).where(
+        CourseMember.id_course.in_(course_ids),
+        CourseMember.id_user == id_user,
+    )
+    allowed = set((await session.execute(owner_q.union(member_q))).scalars().all())
+    if allowed != course_ids:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+async def _insert_quizzes(
+    session: AsyncSession, payloads: list[QuizCreate]
+) -> list[QuizOut]:
+    """
+    Insert quizzes, their questions and answer options with one statement
+    per table, whatever the number of quizzes and questions.
+    """
+    # 1. Quizzes: multi-row INSERT ... RETURNING, in payload order
+    quiz_rows = (await session.execute(
+        insert(Quiz).returning(
+            Quiz.id_quiz, Quiz.title, Quiz.description,
+            sort_by_parameter_order=True,
+        ),
+        [
+            {
+                "id_course": p.id_course,
+                "title": p.title,
+                "description": p.description,
+                "coins": p.coins,
+                "min_correct_ratio": p.min_correct_ratio,
+            }
+            for p in payloads
+        ],
+    )).all()
+
+    # 2. Questions of all quizzes at once
+    questions = [
+        (quiz_row.id_quiz, q)
+        for quiz_row, p in zip(quiz_rows, payloads)
+        for q in p.questions
+    ]
+    if questions:
+        question_ids = (await session.execute(
+            insert(Question).returning(
+                Question.id_question, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    "id_quiz": id_quiz,
+                    "title": q.question_title,
+                    "text": q.question_text,
+                    "study_materials": q.study_materials,
+                }
+                for id_quiz, q in questions
+            ],
+        )).scalars().all()
+
+        # 3. Answer options of all questions at once
+        options = [
+            {
+                "id_question": id_question,
+                "text": a.text,
+                "is_correct": a.is_correct,
+            }
+            for id_question, (_, q) in zip(question_ids, questions)
+            for a in q.answers
+        ]
+        if options:
+            await session.execute(insert(AnswerOption), options)
+
+    return [
+        QuizOut(id_quiz=row.id_quiz, title=row.title, description=row.description)
+        for row in quiz_rows
+    ]
+
+
 @router.post("/create", response_model=QuizOut, status_code=201)
 async def create_quiz(
     payload: QuizCreate,
@@ -44,71 +129,49 @@ async def create_quiz(
     current_user=Depends(get_current_user),
 ):
     # verify user is part of the course (owner or member)
-    owner_q = select(Course.id_course).where(
-        Course.id_course == payload.id_course,
-        Course.id_user == current_user.id_user,
-    )
-    member_q = select(CourseMember.id_course_member).where(
-        CourseMember.id_course == payload.id_course,
-        CourseMember.id_user == current_user.id_user,
-    )
+    await _ensure_can_author(session, current_user.id_user, {payload.id_course})
 
-    owner = await session.execute(owner_q)
-    member = await session.execute(member_q)
-    if owner.scalar_one_or_none() is None and member.scalar_one_or_none() is None:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    (quiz,) = await _insert_quizzes(session, [payload])
+    await session.commit()
 
-    # create the quiz
-    quiz = Quiz(
-        id_course=payload.id_course,
-        title=payload.title,
-        description=payload.description,
-        coins=payload.coins,
-        min_correct_ratio=payload.min_correct_ratio,
-    )
-    session.add(quiz)
-    await session.flush()  # populate quiz.id_quiz
-
-    # create questions and their answer options
-    for q in payload.questions:
-        question = Question(
-            id_quiz=quiz.id_quiz,
-            title=q.question_title,
-            text=q.question_text,
-            study_materials=q.study_materials,
-        )
-        session.add(question)
-        await session.flush()  # populate question.id_question
-
-        for a in q.answers:
-            ao = AnswerOption(
-                id_question=question.id_question,
-                text=a.text,
-                is_correct=a.is_correct,
-            )
-            session.add(ao)
+    return quiz
+
+
+@router.post("/create/bulk", response_model=QuizBulkOut, status_code=201)
+async def create_quizzes_bulk(
+    payload: QuizBulkCreate,
+    session: AsyncSession = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    """
+    Import many quizzes in one transaction; all or nothing.
+    """
+    if not payload.quizzes:
+        return QuizBulkOut(quizzes=[])
+
+    course_ids = {q.id_course for q in payload.quizzes}
+    await _ensure_can_author(session, current_user.id_user, course_ids)
 
-    # commit all and refresh quiz
+    quizzes = await _insert_quizzes(session, payload.quizzes)
     await session.commit()
-    await session.refresh(quiz)
 
-    return quiz
+    return QuizBulkOut(quizzes=quizzes)
 
 @router.get("/for_you/{quiz_id}/do", response_model=QuizDoOut)
 async def do_quiz(
     quiz_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user=Depends(get_current_user),
 ):
-    # 1. Load quiz
-    quiz_obj = await session.get(Quiz, quiz_id)
-    if not quiz_obj:
+    # 1. Load quiz content (cached; it does not change after creation)
+    quiz = await quiz_content_cache.get(session, quiz_id)
+    if quiz is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
     # 2. Membership check
     member_res = await session.execute(
         select(CourseMember.id_course_member).where(
-            CourseMember.id_course == quiz_obj.id_course,
+            CourseMember.id_course == quiz.id_course,
             CourseMember.id_user == current_user.id_user,
         )
     )
@@ -125,71 +188,36 @@ async def do_quiz(
     if taken_res.scalar_one_or_none() is not None:
         raise HTTPException(status_code=403, detail="Quiz already taken")
 
-    # 4. Fetch questions
-    q_res = await session.execute(
-        select(Question).where(Question.id_quiz == quiz_id)
-    )
-    questions = q_res.scalars().all()
-
-    # 5. Fetch all answer options in one go
-    question_ids = [q.id_question for q in questions]
-    ao_res = await session.execute(
-        select(AnswerOption).where(AnswerOption.id_question.in_(question_ids))
-    )
-    all_options = ao_res.scalars().all()
-    opts_map: dict[int, list[AnswerOption]] = {}
-    for opt in all_options:
-        opts_map.setdefault(opt.id_question, []).append(opt)
-
-    # 6. Assemble response
-    question_dos = []
-    for q in questions:
-        q_opts = opts_map.get(q.id_question, [])
-        question_dos.append(
-            QuestionDo(
-                id_question=q.id_question,
-                title=q.title,
-                text=q.text,
-                answers=q_opts,
-            )
+    # 4. Assemble response
+    question_dos = [
+        QuestionDo(
+            id_question=q.id_question,
+            title=q.title,
+            text=q.text,
+            answers=q.options,
         )
+        for q in quiz.questions
+    ]
 
-    return QuizDoOut(title=quiz_obj.title, questions=question_dos)
-
-async def _background_generate_and_save(
-    session,
-    id_quiz_attempt: int,
-    prompt: str,
-):
-    """
-    Runs in the background: calls the LLM, writes feedback into the DB,
-    then fires the asyncio.Event so the SSE stream can emit "done".
-    """
-    # 1. Call LLM
-    feedback = send_to_llm([{"role": "user", "content": prompt}], collection_name='sample_text')
-
-    attempt = await session.get(QuizAttempt, id_quiz_attempt)
-    attempt.feedback = feedback
-    session.add(attempt)
-
-    handle_quiz_attempt = HandleQuizAttempt(id_quiz_attempt=attempt.id_quiz_attempt, handled=False)
-    session.add(handle_quiz_attempt)
-    await session.commit()
-
-
+    return QuizDoOut(title=quiz.title, questions=question_dos)
 
-@router.post("/for_you/{quiz_id}/submit", summary="Submit quiz and stream SSE for feedback")
+@router.post(
+    "/for_you/{quiz_id}/submit",
+    summary="Submit quiz and queue its feedback",
+)
 async def submit_quiz_sse(
     quiz_id: int,
     payload: QuizSubmitRequest,
-    request: Request,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
+    """
+    Grades and stores the attempt and queues its feedback, which arrives
+    later as a `quiz_result` event on `/sse/quiz_results`.
+    """
     # 1) Load quiz
-    quiz = await session.get(Quiz, quiz_id)
-    if not quiz:
+    quiz = await quiz_content_cache.get(session, quiz_id)
+    if quiz is None:
         raise HTTPException(404, "Quiz not found")
 
     # 2) Membership check
@@ -212,11 +240,19 @@ async def submit_quiz_sse(
     if already.scalar_one_or_none() is not None:
         raise HTTPException(403, "Quiz already taken")
 
-    # 4) Create QuizAttempt + save answers
+    # 4) Grade once, here, so read paths can use the stored score
+    score = grade_attempt(
+        quiz.correct_options(),
+        {a.id_question: a.id_answer for a in payload.answers},
+        quiz.min_correct_ratio,
+    )
+
+    # 5) Create QuizAttempt + save answers
     attempt = QuizAttempt(
         id_quiz=quiz_id,
         id_user=current_user.id_user,
         attempt_date=datetime.utcnow(),
+        **score,
     )
     session.add(attempt)
     await session.flush()  # now attempt.id_quiz_attempt is set
@@ -231,38 +267,32 @@ async def submit_quiz_sse(
             )
         )
 
-    await session.commit()
-
-    # 5) Build prompt
+    # 6) Build prompt
     answers_list = [
         {"id_question": a.id_question, "id_answer": a.id_answer}
         for a in payload.answers
     ]
     prompt = await generate_feedback_prompt(quiz_id, answers_list, session)
 
-    # 6) Initialize event and schedule background task
-    evt = asyncio.Event()
-    background_tasks.add_task(
-        _background_generate_and_save,
-        session,
-        id_quiz_attempt,
-        prompt,
-    )
+    # 7) Queue feedback generation in the same transaction as the attempt
+    feedback_queue.enqueue(session, id_quiz_attempt, prompt)
+    await session.commit()
+    feedback_queue.notify()
 
     return {'msg': 'wait for results'}
 
 @router.get("/for_you/{quiz_id}/results", response_model=QuizResultsOut)
 async def get_quiz_results(
     quiz_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user = Depends(get_current_user),
 ):
-        # 2. Load quiz
-    quiz = await session.get(Quiz, quiz_id)
+    # 1. Load quiz content (cached)
+    quiz = await quiz_content_cache.get(session, quiz_id)
     if quiz is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    # 1. Ensure the user has taken this quiz
+    # 2. Ensure the user has taken this quiz
     attempt_res = await session.execute(
         select(QuizAttempt)
         .where(
@@ -276,24 +306,7 @@ async def get_quiz_results(
     if attempt is None:
         raise HTTPException(status_code=422, detail="No quiz result found")
 
-
-    # 3. Fetch all questions for this quiz
-    q_res = await session.execute(
-        select(Question).where(Question.id_quiz == quiz_id)
-    )
-    questions = q_res.scalars().all()
-
-    # 4. Fetch all answer options for these questions
-    question_ids = [q.id_question for q in questions]
-    ao_res = await session.execute(
-        select(AnswerOption).where(AnswerOption.id_question.in_(question_ids))
-    )
-    all_options = ao_res.scalars().all()
-    options_map: dict[int, list[AnswerOption]] = {}
-    for opt in all_options:
-        options_map.setdefault(opt.id_question, []).append(opt)
-
-    # 5. Fetch the user's selected answers in this attempt
+    # 3. Fetch the user's selected answers in this attempt
     aa_res = await session.execute(
         select(QuizAttemptAnswer).where(
             QuizAttemptAnswer.id_quiz_attempt == attempt.id_quiz_attempt
@@ -302,25 +315,19 @@ async def get_quiz_results(
     answered = aa_res.scalars().all()
     selected_map = {a.id_question: a.id_answer_option for a in answered}
 
-    # 6. Build per-question result entries
+    # 4. Build per-question result entries
     question_results: list[QuestionResult] = []
-    correct_count = 0
-    for q in questions:
-        opts = options_map.get(q.id_question, [])
+    for q in quiz.questions:
         # find correct option
-        correct_opt = next((o for o in opts if o.is_correct), None)
+        correct_opt = next((o for o in q.options if o.is_correct), None)
         correct_id = correct_opt.id_answer_option if correct_opt else None
 
         # find selected
         selected_id = selected_map.get(q.id_question)
 
-        # tally correctness
-        if selected_id is not None and selected_id == correct_id:
-            correct_count += 1
-
         ao_results = [
             AnswerOptionResult(id_answer=o.id_answer_option, text=o.text)
-            for o in opts
+            for o in q.options
         ]
 
         question_results.append(
@@ -334,15 +341,13 @@ async def get_quiz_results(
             )
         )
 
-    total = len(question_results)
-    is_min = (correct_count / total) >= quiz.min_correct_ratio if total > 0 else False
-
+    # 5. Score was stored at submit time (or by the backfill job)
     return QuizResultsOut(
         title=quiz.title,
         questions=question_results,
-        correct_answers=correct_count,
-        total_answers=total,
-        is_min_correct_ratio=is_min,
+        correct_answers=attempt.correct_count or 0,
+        total_answers=attempt.total_count or 0,
+        is_min_correct_ratio=bool(attempt.passed),
         coins=quiz.coins,
         feedback=attempt.feedback or "",
     )
\ No newline at end of file
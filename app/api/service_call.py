@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
-from app.db.session import get_session
+from app.db.session import get_session, pool_metrics, replica_monitor, replica_pool_metrics
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from app.services.embeddings import embedding_batcher, embedding_registry
+from app.services.feedback_queue import feedback_queue
 router = APIRouter(prefix="/service_call")
 
 
@@ -12,4 +14,27 @@ async def get_ping():
 @router.get("/test_db")
 async def test_db(db: AsyncSession =Depends(get_session)):
     res = (await db.execute(text("select 1"))).scalar()
-    return res
\ No newline at end of file
+    return res
+
+@router.get("/feedback_queue")
+async def feedback_queue_stats(db: AsyncSession = Depends(get_session)):
+    return await feedback_queue.stats(db)
+
+
+@router.get("/embeddings")
+async def embedding_stats():
+    return {
+        "model": embedding_registry.stats(),
+        "batcher": embedding_batcher.stats(),
+    }
+
+
+@router.get("/db_pool")
+async def db_pool_stats():
+    stats = {"primary": pool_metrics.stats()}
+    if replica_monitor is not None:
+        stats["replica"] = {
+            **replica_pool_metrics.stats(),
+            **replica_monitor.stats(),
+        }
+    return stats
@@ -9,6 +9,7 @@ import typing as tp
 from app.db.queries import get_user_by_username
 from sqlalchemy.exc import NoResultFound
 from app.core import auth
+from app.core.user_cache import UserSnapshot
 
 router = APIRouter(prefix="/user")
 
@@ -20,26 +21,27 @@ router = APIRouter(prefix="/user")
 # ------------------Token-----------------
 @router.post('/token', status_code=200)
 async def create_api_token(
-        user_login: tp.Annotated[OAuth2PasswordRequestForm, Depends()]
+        user_login: tp.Annotated[OAuth2PasswordRequestForm, Depends()],
+        db: AsyncSession = Depends(get_session)
 ) -> user_schemas.Token:
     print(user_login)
     try:
-        user_db = await get_user_by_username(user_login.username)
+        user_db = await get_user_by_username(user_login.username, db)
     except NoResultFound:
         raise HTTPException(status_code=400, detail=f'no user with username {user_login.username}')
     print(user_db)
-    is_password_correct = auth.verify_password(user_login.password, user_db.password_hash)
+    is_password_correct = await auth.password_hasher.verify(user_login.password, user_db.password_hash)
     if not is_password_correct:
         raise HTTPException(status_code=400, detail=f'Incorrect password for username: {user_login.username}')
 
-    token = auth.generate_token(user_login.username)
+    token = auth.generate_token(user_login.username, user_db.id_user)
     return user_schemas.Token(access_token=token, token_type='bearer')
 
 
 
 @router.get('/', status_code=200)
 async def get_current_user(
-        user_db: User = Depends(auth.get_current_user)
+        user_db: UserSnapshot = Depends(auth.get_current_user)
 ) -> user_schemas.UserBase:
     return user_schemas.UserBase(username=str(user_db.username))
 
@@ -50,12 +52,12 @@ async def create_user(
         db:AsyncSession=Depends(get_session)
 ):
     try:
-        user_db = await get_user_by_username(user.username)
+        user_db = await get_user_by_username(user.username, db)
     except NoResultFound:
         user_db = None
     if user_db is not None:
         raise HTTPException(status_code=400, detail=f'Пользователь с username {user.username} уже существует')
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = await auth.password_hasher.hash(user.password)
     user_data = user.model_dump()
     user_data['password_hash'] = hashed_password
     del user_data['password']
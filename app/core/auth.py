@@ -1,6 +1,8 @@
+import asyncio
 import datetime
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Annotated
 
 from fastapi import Depends, HTTPException
@@ -9,8 +11,12 @@ from jose import JWTError, jwt
 from jose.exceptions import JWTError
 from passlib.context import CryptContext
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.settings import Settings
+from app.core.user_cache import UserSnapshot, user_cache
 from app.db.queries import get_user_by_username
+from app.db.session import get_session
 
 
 SECRET_KEY = os.getenv(
@@ -34,7 +40,63 @@ def get_password_hash(password):
     return crypto_context.hash(password)
 
 
-def generate_token(username: str) -> str:
+class PasswordHasher:
+    """
+    Runs bcrypt on a few dedicated threads so it never blocks the event loop
+    (bcrypt releases the GIL). Calls beyond `workers + max_queue` in flight
+    are refused with 503 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, max_queue: int, retry_after: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor: ThreadPoolExecutor | None = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def _run(self, fn, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many logins in progress, try again shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password-hash"
+            )
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, fn, *args
+            )
+        finally:
+            self._in_flight -= 1
+
+    async def verify(self, provided_password, actual_hash) -> bool:
+        return await self._run(verify_password, provided_password, actual_hash)
+
+    async def hash(self, password) -> str:
+        return await self._run(get_password_hash, password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=Settings.password_hash_workers,
+    max_queue=Settings.password_hash_max_queue,
+    retry_after=Settings.password_hash_retry_after,
+)
+
+
+def generate_token(username: str, id_user: int | None = None) -> str:
     now = datetime.datetime.utcnow()
     expire = now + datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
@@ -49,6 +111,8 @@ def generate_token(username: str) -> str:
         "exp": exp,
         "jti": str(uuid.uuid4()),
     }
+    if id_user is not None:
+        to_encode["uid"] = id_user
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -59,18 +123,32 @@ def decode_token(token: str) -> dict:
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token format")
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    return await get_user_by_token(token)
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: AsyncSession = Depends(get_session),
+) -> UserSnapshot:
+    # `session` is the handler's own session: FastAPI caches the dependency
+    user = user_cache.get(token)
+    if user is None:
+        user = await get_user_by_token(token, session)
+    return user
 
 
-def get_user_by_token(token):
+async def get_user_by_token(token, session: AsyncSession | None = None) -> UserSnapshot:
     token_data = decode_token(token)
     username = token_data['sub']
-    try: 
-        user = get_user_by_username(username)
-    except NoResultFound:
-        raise HTTPException(
-            status_code=401,
-            detail='Invalid token. No such user'
-        )
-    return user
\ No newline at end of file
+
+    if Settings.auth_trust_token_claims and "uid" in token_data:
+        user = UserSnapshot(id_user=token_data["uid"], username=username)
+    else:
+        try:
+            user_db = await get_user_by_username(username, session)
+        except NoResultFound:
+            raise HTTPException(
+                status_code=401,
+                detail='Invalid token. No such user'
+            )
+        user = UserSnapshot.from_user(user_db)
+
+    user_cache.put(token, user, expires_at=token_data["exp"])
+    return user
@@ -0,0 +1,263 @@
+# app/core/metrics.py
+
+import bisect
+import threading
+from typing import Callable, Sequence
+
+# seconds; tuned for things that should take milliseconds
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+# seconds; for LLM calls
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+# plain counts, e.g. queries per request or batch sizes
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations, safe to observe from any thread.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # one extra slot for observations above the last bound
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[slot] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """
+        Cumulative counts per upper bound, Prometheus style.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = []
+        running = 0
+        for bound, n in zip((*self.buckets, float("inf")), counts):
+            running += n
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+# ─── Prometheus exposition ───────────────────────────────────────────────────
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in values.items()
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class LabeledHistogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+        self._histograms: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels) -> Histogram:
+        key = self._key(labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, value: float, **labels) -> None:
+        self.labels(**labels).observe(value)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            histograms = dict(self._histograms)
+        return [
+            line
+            for key, histogram in histograms.items()
+            for line in _histogram_lines(self.name, self.labelnames, key, histogram)
+        ]
+
+
+def _histogram_lines(name, labelnames, key, histogram: Histogram) -> list[str]:
+    snapshot = histogram.snapshot()
+    lines = []
+    for bound, count in snapshot["buckets"]:
+        le = f'le="{_number(bound)}"'
+        lines.append(f"{name}_bucket{_labels(labelnames, key, le)} {count}")
+    lines.append(f"{name}_sum{_labels(labelnames, key)} {_number(snapshot['sum'])}")
+    lines.append(f"{name}_count{_labels(labelnames, key)} {snapshot['count']}")
+    return lines
+
+
+class CallbackMetric(_Metric):
+    """
+    Values read at scrape time from state the application already keeps.
+    `fn` returns a number, or a dict of label-value tuples to numbers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        fn: Callable[[], float | dict],
+        labelnames: Sequence[str] = (),
+    ):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.fn = fn
+
+    def _samples(self) -> list[str]:
+        values = self.fn()
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in values.items()
+            if value is not None
+        ]
+
+
+class HistogramView(_Metric):
+    """
+    Exposes a Histogram owned elsewhere, e.g. PoolMetrics.wait_seconds.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Histogram | None]):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def _samples(self) -> list[str]:
+        histogram = self.fn()
+        if histogram is None:
+            return []
+        return _histogram_lines(self.name, (), (), histogram)
+
+
+class MetricsRegistry:
+    """
+    Process-wide set of metrics, rendered in the Prometheus text format.
+    Each worker process reports its own numbers.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> LabeledHistogram:
+        return self._add(LabeledHistogram(name, help, labelnames, buckets))
+
+    def gauge_callback(self, name: str, help: str, fn, labelnames: Sequence[str] = ()) -> None:
+        self._add(CallbackMetric(name, help, "gauge", fn, labelnames))
+
+    def counter_callback(self, name: str, help: str, fn, labelnames: Sequence[str] = ()) -> None:
+        self._add(CallbackMetric(name, help, "counter", fn, labelnames))
+
+    def histogram_view(self, name: str, help: str, fn) -> None:
+        self._add(HistogramView(name, help, fn))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,114 @@
+# app/core/request_metrics.py
+
+import logging
+import time
+
+from app.core.metrics import COUNT_BUCKETS, metrics
+from app.core.settings import Settings
+from app.db.query_stats import QueryStats, current_query_stats
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED = "<unmatched>"
+
+http_requests = metrics.counter(
+    "http_requests_total",
+    "Requests handled, by route template and status code",
+    ["method", "route", "status"],
+)
+http_latency = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time until the response started; for SSE, time to open the stream",
+    ["method", "route"],
+)
+http_in_progress = metrics.gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+)
+db_queries_per_request = metrics.histogram(
+    "http_request_db_queries",
+    "SQL statements run per request",
+    ["route"],
+    buckets=(0, *COUNT_BUCKETS),
+)
+db_seconds_per_request = metrics.histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL per request",
+    ["route"],
+)
+
+
+def route_template(scope) -> str:
+    """
+    The path the request matched, e.g. /course/{course_id}, so ids don't
+    become labels.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware, so streaming responses pass through untouched.
+    Latency is measured to `http.response.start`; DB statements are counted
+    for the whole request, including the body of a stream.
+
+    With `debug_headers` the statement count and DB time so far go out as
+    X-DB-Queries / X-DB-Time-Ms. A statement shape that runs more than
+    `repeat_threshold` times in one request is logged as a likely N+1.
+    """
+
+    def __init__(
+        self,
+        app,
+        debug_headers: bool = Settings.sql_debug_headers,
+        repeat_threshold: int = Settings.sql_repeat_threshold,
+    ):
+        self.app = app
+        self.debug_headers = debug_headers
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        latency = None
+        stats = QueryStats(parent=current_query_stats.get())
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status, latency
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                latency = time.perf_counter() - started
+                if self.debug_headers:
+                    message["headers"] = [
+                        *message.get("headers", ()),
+                        (b"x-db-queries", str(stats.count).encode()),
+                        (b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()),
+                    ]
+            await send(message)
+
+        http_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_progress.inc(-1)
+            current_query_stats.reset(token)
+            method = scope["method"]
+            route = route_template(scope)
+            if latency is None:
+                latency = time.perf_counter() - started
+            http_requests.inc(method=method, route=route, status=str(status))
+            http_latency.observe(latency, method=method, route=route)
+            db_queries_per_request.observe(stats.count, route=route)
+            db_seconds_per_request.observe(stats.seconds, route=route)
+            if self.repeat_threshold:
+                for shape, n in stats.repeated(self.repeat_threshold):
+                    logger.warning(
+                        "%s %s ran the same statement %d times: %s",
+                        method, route, n, shape,
+                    )
@@ -5,12 +5,111 @@ class Settings: # type: ignore
     root_path = Path(__file__).parent.parent.parent
     uploads_path = root_path / 'uploads'
     db_path = root_path / 'vector_db'
+    lexical_index_path = root_path / 'lexical_index'
+    # 0 leaves the choice to onnxruntime (one thread per physical core)
+    embedding_intra_op_threads = int(os.getenv("EMBEDDING_INTRA_OP_THREADS", "0"))
+    embedding_inter_op_threads = int(os.getenv("EMBEDDING_INTER_OP_THREADS", "0"))
+    # concurrent query embeddings wait this long (seconds) to share an ONNX call
+    embedding_batch_window = float(os.getenv("EMBEDDING_BATCH_WINDOW", "0.005"))
+    embedding_batch_max = int(os.getenv("EMBEDDING_BATCH_MAX", "32"))
+    vector_collection_cache_size = int(os.getenv("VECTOR_COLLECTION_CACHE_SIZE", "128"))
+    # dense / lexical / hybrid, for requests that don't choose
+    retrieval_mode = os.getenv("RETRIEVAL_MODE", "dense")
+    # hybrid mode fuses this many candidates from each side
+    retrieval_hybrid_candidates = int(os.getenv("RETRIEVAL_HYBRID_CANDIDATES", "20"))
+    retrieval_rrf_k = int(os.getenv("RETRIEVAL_RRF_K", "60"))
+    # required for the OpenAI API; endpoints behind LLM_BASE_URL may not check it
+    llm_api_key = os.getenv("OPENAI_API_KEY") or None
+    # any OpenAI-compatible endpoint, e.g. test/loadtest/llm_stub.py; None
+    # uses the OpenAI API
+    llm_base_url = os.getenv("LLM_BASE_URL") or None
+    llm_model = os.getenv("LLM_MODEL", "gpt-4.1-mini")
+    llm_timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+    llm_connect_timeout = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    llm_max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    llm_max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    # SDK retries of 429 / 5xx / connection errors, each with backoff
+    llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    feedback_workers = int(os.getenv("FEEDBACK_WORKERS", "4"))
+    feedback_max_attempts = int(os.getenv("FEEDBACK_MAX_ATTEMPTS", "5"))
+    # must exceed the worst-case LLM call, otherwise live jobs get re-claimed
+    feedback_visibility_timeout = float(os.getenv("FEEDBACK_VISIBILITY_TIMEOUT", "300"))
+    feedback_backoff_base = float(os.getenv("FEEDBACK_BACKOFF_BASE", "5"))
+    feedback_backoff_max = float(os.getenv("FEEDBACK_BACKOFF_MAX", "300"))
+    feedback_poll_interval = float(os.getenv("FEEDBACK_POLL_INTERVAL", "2"))
+    quiz_result_channel = os.getenv("QUIZ_RESULT_CHANNEL", "quiz_result")
+    # SSE re-checks the DB this often while the LISTEN connection is down ...
+    sse_poll_interval = float(os.getenv("SSE_POLL_INTERVAL", "1"))
+    # ... and this often as a safety net while notifications are flowing
+    sse_fallback_poll_interval = float(os.getenv("SSE_FALLBACK_POLL_INTERVAL", "15"))
+    sse_tick_interval = float(os.getenv("SSE_TICK_INTERVAL", "1"))
+    sse_heartbeat_interval = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+    sse_max_connections_per_user = int(os.getenv("SSE_MAX_CONNECTIONS_PER_USER", "5"))
+    sse_max_connections = int(os.getenv("SSE_MAX_CONNECTIONS", "50000"))
+    auth_cache_size = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+    auth_cache_ttl = float(os.getenv("AUTH_CACHE_TTL", "60"))
+    # take id_user from the token's `uid` claim instead of looking the user up;
+    # deleted users then keep access until their token expires
+    auth_trust_token_claims = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "0") == "1"
+    password_hash_workers = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    # hashes allowed to wait for a worker before logins get 503
+    password_hash_max_queue = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+    password_hash_retry_after = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "2"))
+    # quiz content cache budget, in answer options (questions count as one)
+    quiz_cache_max_options = int(os.getenv("QUIZ_CACHE_MAX_OPTIONS", "200000"))
+    # processes extracting PDF text; files beyond this wait their turn
+    ingestion_workers = int(os.getenv("INGESTION_WORKERS", "2"))
+    ingestion_upload_chunk_bytes = int(os.getenv("INGESTION_UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+    ingestion_max_upload_bytes = int(os.getenv("INGESTION_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+    # pages handed to an extraction process at a time
+    ingestion_page_window = int(os.getenv("INGESTION_PAGE_WINDOW", "16"))
+    ingestion_embed_batch = int(os.getenv("INGESTION_EMBED_BATCH", "64"))
+    ingestion_chunk_size = int(os.getenv("INGESTION_CHUNK_SIZE", "1000"))
+    ingestion_chunk_overlap = int(os.getenv("INGESTION_CHUNK_OVERLAP", "200"))
+    ingestion_status_interval = float(os.getenv("INGESTION_STATUS_INTERVAL", "1"))
+    # a running ingestion without progress for this long is considered dead
+    ingestion_stale_after = float(os.getenv("INGESTION_STALE_AFTER", "600"))
+
+    db_pool_size = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    # seconds a request waits for a connection before QueuePool gives up
+    db_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # -1 keeps connections forever
+    db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    db_statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # behind PgBouncer in transaction mode prepared statements cannot be
+    # cached per connection; this turns the caches off
+    db_pgbouncer = os.getenv("DB_PGBOUNCER", "0") == "1"
+
+    # optional read replica (libpq DSN); may point at the primary for local runs
+    replica_dsn = os.getenv("POSTGRES_REPLICA_DSN") or None
+    # read-only handlers fall back to the primary beyond this much lag
+    replica_max_lag = float(os.getenv("REPLICA_MAX_LAG", "5"))
+    replica_check_interval = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+
+    # adds X-DB-Queries / X-DB-Time-Ms to every response; for development
+    sql_debug_headers = os.getenv("SQL_DEBUG_HEADERS", "0") == "1"
+    # warn when one request runs the same statement more often; 0 disables
+    sql_repeat_threshold = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+
     def get_url(self) -> str:
+        return self.get_dsn().replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    def get_replica_url(self) -> str | None:
+        if self.replica_dsn is None:
+            return None
+        return self.replica_dsn.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    def get_dsn(self) -> str:
+        """
+        Plain libpq-style DSN, for talking to asyncpg directly.
+        """
         user = os.getenv("POSTGRES_USER", "postgres")
         password = os.getenv("POSTGRES_PASSWORD", "786811")
         db = os.getenv("POSTGRES_DB", "diplom")
         server = os.getenv("POSTGRES_SERVER", "localhost")
         port = os.getenv("POSTGRES_PORT", "5432")
-        return f"postgresql+asyncpg://{user}:{password}@{server}:{port}/{db}"
+        return f"postgresql://{user}:{password}@{server}:{port}/{db}"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
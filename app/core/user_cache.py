@@ -0,0 +1,80 @@
+# app/core/user_cache.py
+
+import time
+from dataclasses import dataclass
+
+from cachetools import TTLCache
+from sqlalchemy import event
+
+from app.core.settings import Settings
+from app.models.user import User
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """
+    What request handlers need to know about the authenticated user.
+    Detached from any session, so it is safe to cache and share.
+    """
+    id_user: int
+    username: str
+    email: str | None = None
+    first_name: str | None = None
+    second_name: str | None = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id_user=user.id_user,
+            username=user.username,
+            email=user.email,
+            first_name=user.first_name,
+            second_name=user.second_name,
+        )
+
+
+class UserCache:
+    """
+    Decoded bearer token -> UserSnapshot, bounded in size and age.
+    Entries never outlive the token's own `exp`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, token: str) -> UserSnapshot | None:
+        entry = self._cache.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            self._cache.pop(token, None)
+            return None
+        return user
+
+    def put(self, token: str, user: UserSnapshot, expires_at: float) -> None:
+        self._cache[token] = (user, expires_at)
+
+    def invalidate_user(self, id_user: int) -> None:
+        stale = [
+            token for token, (user, _) in list(self._cache.items())
+            if user.id_user == id_user
+        ]
+        for token in stale:
+            self._cache.pop(token, None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+user_cache = UserCache(
+    maxsize=Settings.auth_cache_size,
+    ttl=Settings.auth_cache_ttl,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    # covers ORM flushes in this process; other workers rely on the TTL
+    user_cache.invalidate_user(target.id_user)
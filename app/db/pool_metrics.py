@@ -0,0 +1,94 @@
+# app/db/pool_metrics.py
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.core.metrics import Histogram
+
+
+class PoolMetrics:
+    """
+    Counters for one engine's connection pool, fed by pool events and by
+    TimedQueuePool.
+    """
+
+    def __init__(self):
+        self.wait_seconds = Histogram()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.max_checked_out = 0
+        self._pool: Pool | None = None
+
+    def attach(self, pool: Pool) -> None:
+        self._pool = pool
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+        if self._pool is not None and hasattr(self._pool, "checkedout"):
+            self.max_checked_out = max(self.max_checked_out, self._pool.checkedout())
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        pool = self._pool
+        current = {}
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            current = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                # negative while the pool has not filled up to `size` yet
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        return {
+            **current,
+            "max_checked_out": self.max_checked_out,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "wait_seconds": self.wait_seconds.snapshot(),
+        }
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records how long each checkout waited and
+    how many gave up with `QueuePool limit ... reached`.
+    """
+
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.wait_seconds.observe(time.perf_counter() - started)
+
+
+def instrument(pool: Pool) -> PoolMetrics:
+    metrics = PoolMetrics()
+    metrics.attach(pool)
+    if isinstance(pool, TimedQueuePool):
+        pool.metrics = metrics
+    return metrics
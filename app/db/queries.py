@@ -1,11 +1,54 @@
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import User
+from app.models import Quiz, QuizAttempt, User
 from app.db.session import async_session
 
 
 
-async def get_user_by_username(username) -> User:
+async def get_user_by_username(username, session: AsyncSession | None = None) -> User:
+    """
+    Pass the request's session when there is one, to avoid a second pool checkout.
+    """
+    if session is not None:
+        return (await session.execute(select(User).where(User.username == username))).one()[0]
     async with async_session() as db:
         user = (await db.execute(select(User).where(User.username == username))).one()[0]
-        return user
\ No newline at end of file
+        return user
+
+
+async def get_quizzes_for_you(session: AsyncSession, id_course: int, id_user: int):
+    """
+    All quizzes of a course with the user's latest attempt, in one query.
+    Rows: (Quiz, id_quiz_attempt | None, correct_ratio | None).
+    """
+    # latest attempt of the user per quiz of this course
+    ranked = (
+        select(
+            QuizAttempt.id_quiz,
+            QuizAttempt.id_quiz_attempt,
+            QuizAttempt.correct_ratio,
+            func.row_number().over(
+                partition_by=QuizAttempt.id_quiz,
+                order_by=QuizAttempt.attempt_date.desc(),
+            ).label("rn"),
+        )
+        .join(Quiz, Quiz.id_quiz == QuizAttempt.id_quiz)
+        .where(
+            Quiz.id_course == id_course,
+            QuizAttempt.id_user == id_user,
+        )
+        .subquery()
+    )
+    latest = (
+        select(ranked.c.id_quiz, ranked.c.id_quiz_attempt, ranked.c.correct_ratio)
+        .where(ranked.c.rn == 1)
+        .subquery()
+    )
+
+    result = await session.execute(
+        select(Quiz, latest.c.id_quiz_attempt, latest.c.correct_ratio)
+        .outerjoin(latest, latest.c.id_quiz == Quiz.id_quiz)
+        .where(Quiz.id_course == id_course)
+        .order_by(Quiz.id_quiz)
+    )
+    return result.all()
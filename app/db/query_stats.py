@@ -0,0 +1,129 @@
+# app/db/query_stats.py
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import metrics
+
+db_query_seconds = metrics.histogram(
+    "db_query_duration_seconds",
+    "Time spent executing one SQL statement",
+    ["database"],
+)
+
+# asyncpg placeholders, with the casts SQLAlchemy adds to some of them
+_PLACEHOLDER = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?")
+_NUMBER = re.compile(r"\b\d+\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    The statement with parameters and literals blanked out, so that the
+    same query with different ids (or IN lists of different length)
+    compares equal.
+    """
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """
+    SQL statements run within one scope, usually a request. Scopes nest:
+    a statement counts towards every enclosing one.
+    """
+
+    def __init__(self, parent: "QueryStats | None" = None):
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        shape = statement_shape(statement)
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+            stats.shapes[shape] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Statement shapes run more than `threshold` times, most frequent
+        first; the usual sign of a query issued in a loop.
+        """
+        return [
+            (shape, n) for shape, n in self.shapes.most_common() if n > threshold
+        ]
+
+    def assert_at_most(self, budget: int) -> None:
+        if self.count > budget:
+            listing = "\n".join(
+                f"  {n} x {shape}" for shape, n in self.shapes.most_common()
+            )
+            raise AssertionError(
+                f"{self.count} SQL statements, budget was {budget}:\n{listing}"
+            )
+
+
+# set by the request middleware; SQLAlchemy's greenlet bridge carries it into
+# the sync event handlers below
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Count the statements run inside the block, e.g. to hold an endpoint
+    to a query budget in a test:
+
+        with count_queries() as queries:
+            await client.get(f"/course/{id_course}/for_you")
+        queries.assert_at_most(2)
+    """
+    stats = QueryStats(parent=current_query_stats.get())
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def instrument_engine(engine: Engine, database: str) -> None:
+    """
+    Time every statement on `engine` (the sync_engine of an async one).
+    """
+    histogram = db_query_seconds.labels(database=database)
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        histogram.observe(elapsed)
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+    def failed(exception_context):
+        # after_cursor_execute won't fire for this statement
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    event.listen(engine, "handle_error", failed)
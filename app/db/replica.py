@@ -0,0 +1,77 @@
+# app/db/replica.py
+
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# 0 on a primary, and on a replica that has replayed everything it received
+# (an idle primary sends nothing, so replay timestamps alone would age)
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaMonitor:
+    """
+    Decides whether read-only handlers may use the replica.
+
+    Replication lag is measured at most once per `check_interval`, by
+    whichever request needs it first; in between the last verdict is reused.
+    An unreachable replica counts as unusable until the next check.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_lag: float, check_interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: float | None = None
+        self.usable = False
+        self.checked_at = 0.0
+        self.fallbacks = 0
+        self.reads = 0
+        self._lock = asyncio.Lock()
+
+    async def is_usable(self) -> bool:
+        if time.monotonic() - self.checked_at >= self.check_interval:
+            async with self._lock:
+                if time.monotonic() - self.checked_at >= self.check_interval:
+                    await self._check()
+        if self.usable:
+            self.reads += 1
+        else:
+            self.fallbacks += 1
+        return self.usable
+
+    async def _check(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                self.lag = float((await conn.execute(LAG_QUERY)).scalar_one())
+            usable = self.lag <= self.max_lag
+        except Exception as exc:
+            logger.warning("Replica check failed: %r", exc)
+            self.lag = None
+            usable = False
+        if usable != self.usable:
+            logger.warning(
+                "Read replica %s (lag %s s)", "in use" if usable else "bypassed", self.lag
+            )
+        self.usable = usable
+        self.checked_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "usable": self.usable,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "replica_reads": self.reads,
+            "primary_fallbacks": self.fallbacks,
+        }
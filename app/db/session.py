@@ -1,25 +1,98 @@
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.core.settings import settings
+from app.core.settings import Settings, settings
 from app.db.base_class import Base
+from app.db.pool_metrics import TimedQueuePool, instrument
+from app.db.query_stats import instrument_engine
+from app.db.replica import ReplicaMonitor
 
 from typing import AsyncGenerator
 
 
+def engine_options() -> dict:
+    """
+    create_async_engine arguments from Settings.
+    """
+    connect_args = {
+        "statement_cache_size": Settings.db_statement_cache_size,
+    }
+    if Settings.db_pgbouncer:
+        # a transaction-mode bouncer may hand every statement a different
+        # server connection: no cached statements, and unique names for the
+        # ones SQLAlchemy still prepares
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": Settings.db_pool_size,
+        "max_overflow": Settings.db_max_overflow,
+        "pool_timeout": Settings.db_pool_timeout,
+        "pool_recycle": Settings.db_pool_recycle,
+        "pool_pre_ping": Settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
 
-engine = create_async_engine(settings.get_url())
+engine = create_async_engine(settings.get_url(), **engine_options())
+pool_metrics = instrument(engine.sync_engine.pool)
+instrument_engine(engine.sync_engine, "primary")
 
 async_session = sessionmaker(
     engine, autocommit=False, autoflush=False, class_=AsyncSession
 )
 
+# optional read replica
+replica_engine = None
+replica_pool_metrics = None
+replica_monitor = None
+read_async_session = None
+if settings.get_replica_url() is not None:
+    replica_engine = create_async_engine(settings.get_replica_url(), **engine_options())
+    replica_pool_metrics = instrument(replica_engine.sync_engine.pool)
+    instrument_engine(replica_engine.sync_engine, "replica")
+    replica_monitor = ReplicaMonitor(
+        replica_engine,
+        max_lag=Settings.replica_max_lag,
+        check_interval=Settings.replica_check_interval,
+    )
+    read_async_session = sessionmaker(
+        replica_engine, autocommit=False, autoflush=False, class_=AsyncSession
+    )
+
+
 async def get_session():
     async with async_session() as session:
         yield session
 
 
+async def use_read_session() -> sessionmaker:
+    """
+    Session factory for read-only work: the replica while it is reachable
+    and within Settings.replica_max_lag, the primary otherwise.
+    """
+    if replica_monitor is not None and await replica_monitor.is_usable():
+        return read_async_session
+    return async_session
+
+
+async def get_read_session():
+    """
+    Like get_session, for handlers that only read. Data may be up to
+    Settings.replica_max_lag seconds old, so don't use it where a client
+    must see its own write.
+    """
+    factory = await use_read_session()
+    async with factory() as session:
+        yield session
+
+
 async def init_models():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
@@ -1,9 +1,38 @@
-from app.api import service_call, user, course, quiz, llm, sse
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.api import service_call, user, course, quiz, llm, sse, metrics
+from app.core.auth import password_hasher
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.services.async_llm import chat_client
+from app.services.embeddings import embedding_registry
+from app.services.feedback_queue import feedback_queue
+from app.services.ingestion import ingestion_pipeline
+from app.services.quiz_notify import quiz_result_listener
+from app.services.sse_broker import sse_broker
 from fastapi import FastAPI
 
 from fastapi.middleware.cors import CORSMiddleware
 
-application = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # build the ONNX session once, before the first request needs it
+    await asyncio.to_thread(embedding_registry.load)
+    await feedback_queue.start()
+    await quiz_result_listener.start()
+    await sse_broker.start()
+    await ingestion_pipeline.start()
+    yield
+    await ingestion_pipeline.stop()
+    await sse_broker.stop()
+    await quiz_result_listener.stop()
+    await feedback_queue.stop()
+    await chat_client.aclose()
+    password_hasher.shutdown()
+
+
+application = FastAPI(lifespan=lifespan)
 
 
 origins = [
@@ -17,6 +46,8 @@ application.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# outermost, so its timings cover the other middleware too
+application.add_middleware(RequestMetricsMiddleware)
 
 def include_routers(routers: list, prefix: str) -> None:
     for router_info in routers:
@@ -29,7 +60,8 @@ root_routers = [
     (course.router, ['Управление курсами']),
     (quiz.router, ['Управление']),
     (llm.router, ['Взаимодействие с LLM']),
-    (sse.router, ['SSE'])
+    (sse.router, ['SSE']),
+    (metrics.router, ['Метрики']),
 ]
 
 include_routers(root_routers, "")
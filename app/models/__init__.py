@@ -7,4 +7,6 @@ from .quiz import Quiz
 from .user import User
 from .quiz_attempt_answer import QuizAttemptAnswer
 from .handle_quiz_attempt import HandleQuizAttempt
-from .file import File
\ No newline at end of file
+from .file import File
+from .feedback_job import FeedbackJob
+from .file_chunk import FileChunk
\ No newline at end of file
@@ -0,0 +1,67 @@
+# app/models/feedback_job.py
+
+from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+class FeedbackJob(Base):
+    __tablename__ = "feedback_job"
+
+    id_feedback_job: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        index=True,
+        comment="PK"
+    )
+    id_quiz_attempt: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("quiz_attempt.id_quiz_attempt", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="FK → QuizAttempt"
+    )
+    prompt: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+        comment="Prompt sent to the LLM"
+    )
+    status: Mapped[str] = mapped_column(
+        String(16),
+        server_default=text("'pending'"),
+        nullable=False,
+        index=True,
+        comment="pending / running / done / failed"
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        server_default=text("0"),
+        nullable=False,
+        comment="Number of times the job was claimed"
+    )
+    run_after: Mapped[DateTime] = mapped_column(
+        DateTime,
+        nullable=False,
+        index=True,
+        comment="Earliest time the job may run"
+    )
+    locked_until: Mapped[DateTime] = mapped_column(
+        DateTime,
+        nullable=True,
+        comment="Visibility timeout of a running job"
+    )
+    last_error: Mapped[str] = mapped_column(
+        Text,
+        nullable=True,
+        comment="Error of the last failed run"
+    )
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime,
+        nullable=False,
+        comment="Enqueue timestamp"
+    )
+    finished_at: Mapped[DateTime] = mapped_column(
+        DateTime,
+        nullable=True,
+        comment="Completion timestamp"
+    )
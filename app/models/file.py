@@ -1,6 +1,6 @@
 # app/models/file.py
 
-from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base_class import Base
@@ -26,3 +26,47 @@ class File(Base):
         index=True,
         comment="FK → Course"
     )
+    stored_path: Mapped[str] = mapped_column(
+        String(1024),
+        nullable=True,
+        comment="Upload location on disk"
+    )
+    content_hash: Mapped[str] = mapped_column(
+        String(64),
+        nullable=True,
+        comment="sha256 of the uploaded bytes"
+    )
+    status: Mapped[str] = mapped_column(
+        String(16),
+        server_default=text("'done'"),
+        nullable=False,
+        index=True,
+        comment="pending / running / done / failed"
+    )
+    pages_total: Mapped[int] = mapped_column(
+        Integer,
+        nullable=True,
+        comment="Pages in the PDF, once known"
+    )
+    pages_done: Mapped[int] = mapped_column(
+        Integer,
+        server_default=text("0"),
+        nullable=False,
+        comment="Pages extracted, embedded and stored"
+    )
+    chunks_done: Mapped[int] = mapped_column(
+        Integer,
+        server_default=text("0"),
+        nullable=False,
+        comment="Chunks stored in the vector collection"
+    )
+    error: Mapped[str] = mapped_column(
+        Text,
+        nullable=True,
+        comment="Why ingestion failed"
+    )
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime,
+        nullable=True,
+        comment="Last progress update"
+    )
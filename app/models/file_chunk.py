@@ -0,0 +1,44 @@
+# app/models/file_chunk.py
+
+from sqlalchemy import Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+class FileChunk(Base):
+    __tablename__ = "file_chunk"
+    __table_args__ = (
+        UniqueConstraint(
+            "id_file", "page_hash", "chunk_id", name="uq_file_chunk_page_chunk"
+        ),
+    )
+
+    id_file_chunk: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        index=True,
+        comment="PK"
+    )
+    id_file: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("file.id_file", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="FK → File"
+    )
+    chunk_id: Mapped[str] = mapped_column(
+        String(128),
+        nullable=False,
+        comment="Vector id in the course collection"
+    )
+    page: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="Page the chunk was taken from"
+    )
+    page_hash: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        index=True,
+        comment="sha256 of the page text and chunking parameters"
+    )
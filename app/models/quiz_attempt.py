@@ -1,6 +1,6 @@
 # app/models/quiz_attempt.py
 
-from sqlalchemy import Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Integer, DateTime, Text, Float, Boolean, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base_class import Base
@@ -38,3 +38,23 @@ class QuizAttempt(Base):
         nullable=True,
         comment="User feedback"
     )
+    correct_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=True,
+        comment="Correctly answered questions"
+    )
+    total_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=True,
+        comment="Questions in the quiz at submit time"
+    )
+    correct_ratio: Mapped[float] = mapped_column(
+        Float,
+        nullable=True,
+        comment="correct_count / total_count"
+    )
+    passed: Mapped[bool] = mapped_column(
+        Boolean,
+        nullable=True,
+        comment="correct_ratio reached quiz.min_correct_ratio"
+    )
@@ -1,11 +1,25 @@
 # app/schemas/file.py
 
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 
 class FileOut(BaseModel):
     id_file: int
     file_name: str
+    status: str
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class FileStatusOut(BaseModel):
+    id_file: int
+    file_name: str
+    status: str
+    pages_total: Optional[int] = None
+    pages_done: int
+    chunks_done: int
+    error: Optional[str] = None
 
     model_config = {
         "from_attributes": True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, Field
-from typing import Literal, List
+from typing import Literal, List, Optional
 
 class Message(BaseModel):
     text: str
@@ -30,6 +30,11 @@ class AskPayload(BaseModel):
 class MutationPayload(AskPayload):
     prev_messages: List[Message]
     user_message: str
+    # course whose files the answer may draw on; none means no retrieval
+    id_course: Optional[int] = None
+    # dense (embeddings), lexical (BM25) or hybrid (both, rank-fused);
+    # defaults to Settings.retrieval_mode
+    retrieval: Optional[Literal['dense', 'lexical', 'hybrid']] = None
 
 class LLMResponse(BaseModel):
     text: str
\ No newline at end of file
@@ -3,6 +3,8 @@
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
+from app.schemas.course import QuizOut
+
 
 class AnswerOptionCreate(BaseModel):
     text: str
@@ -37,6 +39,18 @@ class QuizCreate(BaseModel):
         "extra": "forbid"
     }
 
+class QuizBulkCreate(BaseModel):
+    quizzes: List[QuizCreate]
+
+    model_config = {
+        "extra": "forbid"
+    }
+
+
+class QuizBulkOut(BaseModel):
+    quizzes: List[QuizOut]
+
+
 class AnswerOptionDo(BaseModel):
     id_answer_option: int = Field(alias="id_answer")
     text: str
@@ -0,0 +1,173 @@
+# app/services/async_llm.py
+
+import asyncio
+import time
+from typing import AsyncIterator, List
+
+import httpx
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionChunk
+
+from app.core.metrics import SLOW_BUCKETS, metrics
+from app.core.settings import Settings
+
+llm_seconds = metrics.histogram(
+    "llm_request_duration_seconds",
+    "Completion latency, queueing on the concurrency limit included",
+    ["kind"],
+    buckets=SLOW_BUCKETS,
+)
+llm_first_token_seconds = metrics.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time until a streamed completion produced its first chunk",
+    buckets=SLOW_BUCKETS,
+)
+llm_tokens = metrics.counter(
+    "llm_tokens_total", "Tokens reported by the provider", ["kind", "type"]
+)
+llm_errors = metrics.counter(
+    "llm_errors_total", "Completions that raised", ["kind", "error"]
+)
+
+
+def _count_usage(kind: str, usage) -> None:
+    if usage is None:
+        return
+    llm_tokens.inc(usage.prompt_tokens or 0, kind=kind, type="prompt")
+    llm_tokens.inc(usage.completion_tokens or 0, kind=kind, type="completion")
+
+
+class AsyncLLMClient:
+    """
+    One AsyncOpenAI client per process, sharing a single httpx connection
+    pool. A semaphore caps how many completions are in flight at once so a
+    burst of requests queues here instead of piling onto the provider.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None,
+        base_url: str | None = None,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 100,
+        max_concurrency: int = 32,
+        max_retries: int = 2,
+    ):
+        self._api_key = api_key
+        self._base_url = base_url
+        self._max_retries = max_retries
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: AsyncOpenAI | None = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            api_key = self._api_key
+            if api_key is None:
+                if self._base_url is None:
+                    raise RuntimeError(
+                        "OPENAI_API_KEY is not set; set it, or LLM_BASE_URL "
+                        "for an endpoint that needs no key"
+                    )
+                # the SDK insists on a key even where nobody checks it
+                api_key = "unused"
+            self._client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=self._base_url,
+                timeout=self._timeout,
+                max_retries=self._max_retries,
+                http_client=httpx.AsyncClient(
+                    limits=self._limits,
+                    timeout=self._timeout,
+                ),
+            )
+        return self._client
+
+    def install(self, client) -> None:
+        """
+        Send completions to `client` instead, e.g. a local stub with the
+        AsyncOpenAI interface for load tests.
+        """
+        self._client = client
+
+    async def complete(
+        self,
+        messages: List[dict[str, str]],
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: int = 512,
+    ) -> str:
+        started = time.perf_counter()
+        try:
+            async with self._semaphore:
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+        except Exception as exc:
+            llm_errors.inc(kind="complete", error=type(exc).__name__)
+            raise
+        llm_seconds.observe(time.perf_counter() - started, kind="complete")
+        _count_usage("complete", response.usage)
+        return response.choices[0].message.content.strip()
+
+    async def stream(
+        self,
+        messages: List[dict[str, str]],
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: int = 512,
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        """
+        Yield completion chunks as they arrive. The last chunk carries
+        `usage` and no choices.
+        """
+        started = time.perf_counter()
+        first = True
+        try:
+            async with self._semaphore:
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                try:
+                    async for chunk in response:
+                        if first:
+                            first = False
+                            llm_first_token_seconds.observe(time.perf_counter() - started)
+                        _count_usage("stream", chunk.usage)
+                        yield chunk
+                finally:
+                    await response.close()
+        except Exception as exc:
+            llm_errors.inc(kind="stream", error=type(exc).__name__)
+            raise
+        llm_seconds.observe(time.perf_counter() - started, kind="stream")
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+chat_client = AsyncLLMClient(
+    api_key=Settings.llm_api_key,
+    base_url=Settings.llm_base_url,
+    timeout=Settings.llm_timeout,
+    connect_timeout=Settings.llm_connect_timeout,
+    max_connections=Settings.llm_max_connections,
+    max_concurrency=Settings.llm_max_concurrency,
+    max_retries=Settings.llm_max_retries,
+)
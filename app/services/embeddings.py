@@ -0,0 +1,246 @@
+# app/services/embeddings.py
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from functools import cached_property
+from typing import List
+
+from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+from app.core.metrics import COUNT_BUCKETS, metrics
+from app.core.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_PROVIDERS = ["CPUExecutionProvider"]
+
+embedding_seconds = metrics.histogram(
+    "embedding_duration_seconds", "Time spent in one embedding model call"
+)
+embedding_batch_size = metrics.histogram(
+    "embedding_batch_size", "Texts per embedding model call", buckets=COUNT_BUCKETS
+)
+
+
+class TunedONNXMiniLM(ONNXMiniLM_L6_V2):
+    """
+    ONNXMiniLM_L6_V2 with configurable onnxruntime thread pools.
+    """
+
+    def __init__(
+        self,
+        preferred_providers: List[str] = None,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+    ) -> None:
+        super().__init__(preferred_providers=preferred_providers)
+        self._intra_op_threads = intra_op_threads
+        self._inter_op_threads = inter_op_threads
+
+    @cached_property
+    def model(self):
+        so = self.ort.SessionOptions()
+        so.log_severity_level = 3
+        so.graph_optimization_level = self.ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        so.intra_op_num_threads = self._intra_op_threads
+        so.inter_op_num_threads = self._inter_op_threads
+
+        return self.ort.InferenceSession(
+            os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME, "model.onnx"),
+            providers=self._preferred_providers,
+            sess_options=so,
+        )
+
+
+class EmbeddingRegistry:
+    """
+    Process-wide holder of the embedding model.
+
+    The ONNX session is built once (normally from the application lifespan)
+    and shared by every caller; onnxruntime sessions are safe to run from
+    several threads at once.
+    """
+
+    def __init__(
+        self,
+        providers: List[str] = None,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+    ):
+        self._providers = providers or EMBEDDING_PROVIDERS
+        self._intra_op_threads = intra_op_threads
+        self._inter_op_threads = inter_op_threads
+        self._lock = threading.Lock()
+        self._model: ONNXMiniLM_L6_V2 | None = None
+        self._stats_lock = threading.Lock()
+        self.load_seconds: float | None = None
+        self.calls = 0
+        self.texts = 0
+        self.total_seconds = 0.0
+        self.last_seconds: float | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> ONNXMiniLM_L6_V2:
+        """
+        Return the shared model, building and warming it up on first use.
+        """
+        if self._model is not None:
+            return self._model
+
+        with self._lock:
+            if self._model is None:
+                started = time.perf_counter()
+                model = TunedONNXMiniLM(
+                    preferred_providers=self._providers,
+                    intra_op_threads=self._intra_op_threads,
+                    inter_op_threads=self._inter_op_threads,
+                )
+                # downloads the weights if needed and builds the ONNX session
+                model(["warm up"])
+                self.load_seconds = time.perf_counter() - started
+                self._model = model
+                logger.info(
+                    "Embedding model loaded in %.3fs (intra_op=%s, inter_op=%s)",
+                    self.load_seconds,
+                    self._intra_op_threads,
+                    self._inter_op_threads,
+                )
+        return self._model
+
+    def install(self, model) -> None:
+        """
+        Use `model` (any callable from texts to vectors) instead of building
+        the ONNX one, e.g. a stub for load tests.
+        """
+        with self._lock:
+            self._model = model
+            self.load_seconds = 0.0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        model = self.load()
+
+        started = time.perf_counter()
+        embeddings = model(texts)
+        elapsed = time.perf_counter() - started
+        embedding_seconds.observe(elapsed)
+        embedding_batch_size.observe(len(texts))
+
+        with self._stats_lock:
+            self.calls += 1
+            self.texts += len(texts)
+            self.total_seconds += elapsed
+            self.last_seconds = elapsed
+        logger.debug("Embedded %d texts in %.3fs", len(texts), elapsed)
+        return embeddings
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "loaded": self.is_loaded,
+                "load_seconds": self.load_seconds,
+                "calls": self.calls,
+                "texts": self.texts,
+                "total_seconds": self.total_seconds,
+                "avg_seconds": self.total_seconds / self.calls if self.calls else None,
+                "last_seconds": self.last_seconds,
+            }
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embed requests into one model call.
+
+    A request waits at most `window` seconds for company, or until
+    `max_batch` requests are queued. Batches run one at a time, since a
+    single ONNX call already uses every core, and whatever queues up while
+    one runs goes into the next.
+    """
+
+    def __init__(self, registry: EmbeddingRegistry, window: float = 0.005, max_batch: int = 32):
+        self.registry = registry
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._running = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.requests += 1
+
+        if len(self._pending) % self.max_batch == 0:
+            # a full batch; don't wait for the timer
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.get_running_loop().create_task(self._run_batch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self) -> None:
+        async with self._running:
+            # taken only now, so requests that queued behind the previous
+            # batch ride along
+            batch = self._pending[:self.max_batch]
+            self._pending = self._pending[self.max_batch:]
+            if self._pending and self._timer is None:
+                self._dispatch()
+            # callers that gave up don't need an embedding
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                return
+
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            try:
+                embeddings = await asyncio.to_thread(
+                    self.registry.embed, [text for text, _ in batch]
+                )
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch": self.requests / self.batches if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "queued": len(self._pending),
+        }
+
+
+embedding_registry = EmbeddingRegistry(
+    intra_op_threads=Settings.embedding_intra_op_threads,
+    inter_op_threads=Settings.embedding_inter_op_threads,
+)
+
+embedding_batcher = EmbeddingBatcher(
+    embedding_registry,
+    window=Settings.embedding_batch_window,
+    max_batch=Settings.embedding_batch_max,
+)
@@ -0,0 +1,323 @@
+# app/services/feedback_queue.py
+
+import asyncio
+import logging
+import random
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import Settings
+from app.db.session import async_session
+from app.models.feedback_job import FeedbackJob
+from app.models.handle_quiz_attempt import HandleQuizAttempt
+from app.models.quiz import Quiz
+from app.models.quiz_attempt import QuizAttempt
+from app.services.llm_client import send_to_llm
+from app.services.quiz_notify import publish_quiz_result
+from app.services.vector_store import course_collection_name
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class FeedbackQueue:
+    """
+    Postgres-backed queue of feedback generation jobs.
+
+    Jobs are rows in `feedback_job`; a fixed number of worker coroutines
+    claim them with `FOR UPDATE SKIP LOCKED`, so several processes can share
+    the table. A claimed job is invisible to other workers until its
+    visibility timeout expires, which is also how jobs interrupted by a
+    crash or restart get picked up again.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_attempts: int = 5,
+        visibility_timeout: float = 300.0,
+        backoff_base: float = 5.0,
+        backoff_max: float = 300.0,
+        poll_interval: float = 2.0,
+    ):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._workers: list[asyncio.Task] = []
+        self._stopping = False
+        self.busy_workers = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        # seconds from enqueue to completion of recently finished jobs
+        self.latencies: deque[float] = deque(maxlen=1000)
+
+    # ─── Producer side ───────────────────────────────────────────────────────
+
+    def enqueue(
+        self, session: AsyncSession, id_quiz_attempt: int, prompt: str
+    ) -> FeedbackJob:
+        """
+        Add a job to the caller's transaction; it becomes visible on commit.
+        """
+        now = datetime.utcnow()
+        job = FeedbackJob(
+            id_quiz_attempt=id_quiz_attempt,
+            prompt=prompt,
+            status=PENDING,
+            attempts=0,
+            run_after=now,
+            created_at=now,
+        )
+        session.add(job)
+        return job
+
+    def notify(self) -> None:
+        """
+        Wake idle workers of this process instead of waiting for the next poll.
+        """
+        self._wakeup.set()
+
+    # ─── Worker pool ─────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"feedback-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        # in-flight jobs stay 'running' and are re-claimed after the timeout
+        self._stopping = True
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self) -> None:
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Failed to claim feedback job")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            self.busy_workers += 1
+            try:
+                await self._run(job)
+            except Exception:
+                # the job stays claimed and is retried after its timeout
+                logger.exception("Feedback job %s crashed", job.id_feedback_job)
+                await asyncio.sleep(self.poll_interval)
+            finally:
+                self.busy_workers -= 1
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        candidate = (
+            select(FeedbackJob.id_feedback_job)
+            .where(
+                or_(
+                    and_(
+                        FeedbackJob.status == PENDING,
+                        FeedbackJob.run_after <= now,
+                    ),
+                    and_(
+                        FeedbackJob.status == RUNNING,
+                        FeedbackJob.locked_until < now,
+                        FeedbackJob.attempts < self.max_attempts,
+                    ),
+                )
+            )
+            .order_by(FeedbackJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with async_session() as session:
+            # runs that kept dying on their last attempt are not retried
+            exhausted = await session.execute(
+                update(FeedbackJob)
+                .where(
+                    FeedbackJob.status == RUNNING,
+                    FeedbackJob.locked_until < now,
+                    FeedbackJob.attempts >= self.max_attempts,
+                )
+                .values(
+                    status=FAILED,
+                    finished_at=now,
+                    locked_until=None,
+                    last_error="Timed out on the last attempt",
+                )
+            )
+            self.failed += exhausted.rowcount
+            result = await session.execute(
+                update(FeedbackJob)
+                .where(FeedbackJob.id_feedback_job == candidate)
+                .values(
+                    status=RUNNING,
+                    attempts=FeedbackJob.attempts + 1,
+                    locked_until=now + timedelta(seconds=self.visibility_timeout),
+                )
+                .returning(
+                    FeedbackJob.id_feedback_job,
+                    FeedbackJob.id_quiz_attempt,
+                    FeedbackJob.prompt,
+                    FeedbackJob.attempts,
+                    FeedbackJob.created_at,
+                )
+            )
+            job = result.one_or_none()
+            await session.commit()
+        return job
+
+    async def _run(self, job) -> None:
+        try:
+            # retrieve from the files of the quiz's course
+            async with async_session() as session:
+                id_course = (await session.execute(
+                    select(Quiz.id_course)
+                    .join(QuizAttempt, QuizAttempt.id_quiz == Quiz.id_quiz)
+                    .where(QuizAttempt.id_quiz_attempt == job.id_quiz_attempt)
+                )).scalar_one()
+            feedback = await send_to_llm(
+                [{"role": "user", "content": job.prompt}],
+                collection_name=course_collection_name(id_course),
+            )
+        except Exception as exc:
+            logger.warning(
+                "Feedback job %s failed (attempt %s): %r",
+                job.id_feedback_job, job.attempts, exc,
+            )
+            await self._fail(job, repr(exc))
+            return
+
+        now = datetime.utcnow()
+        async with async_session() as session:
+            # `attempts` doubles as a fencing token: if the job timed out and
+            # was claimed again, this stale run must not write anything
+            done = await session.execute(
+                update(FeedbackJob)
+                .where(
+                    FeedbackJob.id_feedback_job == job.id_feedback_job,
+                    FeedbackJob.status == RUNNING,
+                    FeedbackJob.attempts == job.attempts,
+                )
+                .values(status=DONE, finished_at=now, locked_until=None, last_error=None)
+            )
+            if done.rowcount == 0:
+                await session.rollback()
+                return
+
+            attempt = (await session.execute(
+                update(QuizAttempt)
+                .where(QuizAttempt.id_quiz_attempt == job.id_quiz_attempt)
+                .values(feedback=feedback)
+                .returning(QuizAttempt.id_user, QuizAttempt.id_quiz)
+            )).one()
+            session.add(
+                HandleQuizAttempt(id_quiz_attempt=job.id_quiz_attempt, handled=False)
+            )
+            await publish_quiz_result(session, attempt.id_user, attempt.id_quiz)
+            await session.commit()
+
+        self.completed += 1
+        self.latencies.append((now - job.created_at).total_seconds())
+
+    async def _fail(self, job, error: str) -> None:
+        now = datetime.utcnow()
+        if job.attempts >= self.max_attempts:
+            values = dict(status=FAILED, finished_at=now, locked_until=None, last_error=error)
+            self.failed += 1
+        else:
+            delay = min(self.backoff_base * 2 ** (job.attempts - 1), self.backoff_max)
+            delay *= random.uniform(0.8, 1.2)
+            values = dict(
+                status=PENDING,
+                run_after=now + timedelta(seconds=delay),
+                locked_until=None,
+                last_error=error,
+            )
+            self.retried += 1
+
+        async with async_session() as session:
+            await session.execute(
+                update(FeedbackJob)
+                .where(
+                    FeedbackJob.id_feedback_job == job.id_feedback_job,
+                    FeedbackJob.attempts == job.attempts,
+                )
+                .values(**values)
+            )
+            await session.commit()
+
+    # ─── Metrics ─────────────────────────────────────────────────────────────
+
+    async def stats(self, session: AsyncSession) -> dict:
+        rows = await session.execute(
+            select(FeedbackJob.status, func.count())
+            .where(FeedbackJob.status.in_([PENDING, RUNNING]))
+            .group_by(FeedbackJob.status)
+        )
+        by_status = dict(rows.all())
+        oldest = await session.execute(
+            select(func.min(FeedbackJob.created_at))
+            .where(FeedbackJob.status == PENDING)
+        )
+        oldest_pending = oldest.scalar_one_or_none()
+
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float):
+            if not latencies:
+                return None
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)]
+
+        return {
+            "queue_depth": by_status.get(PENDING, 0),
+            "running": by_status.get(RUNNING, 0),
+            "oldest_pending_seconds": (
+                (datetime.utcnow() - oldest_pending).total_seconds()
+                if oldest_pending else None
+            ),
+            "workers": self.concurrency,
+            "busy_workers": self.busy_workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "latency_seconds": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+            },
+        }
+
+
+feedback_queue = FeedbackQueue(
+    concurrency=Settings.feedback_workers,
+    max_attempts=Settings.feedback_max_attempts,
+    visibility_timeout=Settings.feedback_visibility_timeout,
+    backoff_base=Settings.feedback_backoff_base,
+    backoff_max=Settings.feedback_backoff_max,
+    poll_interval=Settings.feedback_poll_interval,
+)
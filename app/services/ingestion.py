@@ -0,0 +1,456 @@
+# app/services/ingestion.py
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from fastapi import UploadFile
+from sqlalchemy import bindparam, delete, insert, select, tuple_, update
+
+from app.core.metrics import SLOW_BUCKETS, metrics
+from app.core.settings import Settings
+from app.db.session import async_session
+from app.models.file import File as CourseFile
+from app.models.file_chunk import FileChunk
+from app.services.embeddings import embedding_registry
+from app.services.llm_client import (
+    chunk_id,
+    delete_chunks,
+    store_chunks_with_precomputed_embeddings,
+    sync_lexical_index,
+    update_chunk_metadatas,
+)
+from app.services.lexical_index import lexical_store
+from app.services.pdf_pages import content_hash, count_pages, extract_page_chunks
+from app.services.vector_store import course_collection_name, vector_store
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+ingestion_files = metrics.counter(
+    "ingestion_files_total", "Ingestion runs finished, by outcome", ["result"]
+)
+ingestion_seconds = metrics.histogram(
+    "ingestion_duration_seconds", "Time to ingest one file", buckets=SLOW_BUCKETS
+)
+
+
+def _remove_if_exists(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.detail = f"Files larger than {limit // (1024 * 1024)} MiB are not accepted"
+
+
+class _FileChunks:
+    """
+    Chunk bookkeeping of one file while it is re-ingested.
+    """
+
+    def __init__(self, rows):
+        # (page hash, chunk id) -> page, as recorded by the previous version
+        self.previous_rows: dict[tuple[str, str], int] = {}
+        # chunk id -> page stored in its vector metadata (its first page)
+        self.previous_page: dict[str, int] = {}
+        self.chunks_of_page: dict[str, list[str]] = {}
+        for page_hash, cid, page in rows:
+            self.previous_rows[(page_hash, cid)] = page
+            self.previous_page.setdefault(cid, page)
+            self.chunks_of_page.setdefault(page_hash, []).append(cid)
+        self.known_page_hashes = frozenset(self.chunks_of_page)
+        # filled while the new version is read
+        self.rows: set[tuple[str, str]] = set()
+        self.first_page: dict[str, int] = {}
+
+
+class IngestionPipeline:
+    """
+    Turns uploaded PDFs into vectors of their course collection without
+    blocking the API worker.
+
+    Text extraction and chunking run in a process pool, one window of pages
+    at a time, so neither the document nor its text is ever fully in memory.
+    The next window is extracted while the current one is embedded in
+    batches with the shared model (on a thread) and written to Chroma from
+    this process, which owns the persistent client. Progress is stored on
+    the `file` row after every window.
+
+    Re-ingesting a file is incremental: vector ids are content hashes, pages
+    whose hash is recorded in `file_chunk` are not even chunked again, only
+    chunks the collection lacks are embedded, and chunks the new version no
+    longer has are deleted at the end.
+
+    The collection's BM25 index is brought in step with the file's vectors
+    once the file is done, under the index's lock (see sync_lexical_index).
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        page_window: int = 16,
+        embed_batch: int = 64,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        upload_chunk_bytes: int = 1024 * 1024,
+        max_upload_bytes: int = 200 * 1024 * 1024,
+        stale_after: float = 600.0,
+    ):
+        self.workers = workers
+        self.page_window = page_window
+        self.embed_batch = embed_batch
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.upload_chunk_bytes = upload_chunk_bytes
+        self.max_upload_bytes = max_upload_bytes
+        self.stale_after = stale_after
+        self._pool: ProcessPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(workers)
+        self._tasks: set[asyncio.Task] = set()
+
+    # ─── Upload ──────────────────────────────────────────────────────────────
+
+    async def save_upload(self, upload: UploadFile, path: str) -> str:
+        """
+        Copy the upload to `path` chunk by chunk; returns its sha256.
+        """
+        # file system calls can block for long on a busy disk, so all of
+        # them run in threads
+        await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+        size = 0
+        digest = hashlib.sha256()
+        out = await asyncio.to_thread(open, path, "wb")
+        try:
+            try:
+                while chunk := await upload.read(self.upload_chunk_bytes):
+                    size += len(chunk)
+                    if size > self.max_upload_bytes:
+                        raise UploadTooLarge(self.max_upload_bytes)
+                    digest.update(chunk)
+                    await asyncio.to_thread(out.write, chunk)
+            finally:
+                await asyncio.to_thread(out.close)
+        except BaseException:
+            await self.remove_upload(path)
+            raise
+        return digest.hexdigest()
+
+    @staticmethod
+    async def remove_upload(path: str | None) -> None:
+        """
+        Delete a stored upload, if there is one.
+        """
+        if path:
+            await asyncio.to_thread(_remove_if_exists, path)
+
+    # ─── Lifecycle ───────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        # spawn: forking a process that holds the ONNX session and asyncio
+        # loop is unsafe, and workers only need pymupdf
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # files uploaded just before a restart
+        async with async_session() as session:
+            pending = (await session.execute(
+                select(CourseFile.id_file).where(CourseFile.status == PENDING)
+            )).scalars().all()
+        for id_file in pending:
+            self.submit(id_file)
+
+    async def stop(self) -> None:
+        # interrupted files stay 'running' until they go stale; re-upload
+        # to ingest them again
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def queued_files(self) -> int:
+        """
+        Files submitted in this process and not finished yet, running or
+        waiting for a slot.
+        """
+        return len(self._tasks)
+
+    def is_active(self, file_rec: CourseFile) -> bool:
+        """
+        Whether a pipeline is (probably) still working on the file. Runs
+        interrupted by a restart stop reporting progress and count as dead.
+        """
+        if file_rec.status not in (PENDING, RUNNING):
+            return False
+        if file_rec.status == PENDING or file_rec.updated_at is None:
+            return True
+        return datetime.utcnow() - file_rec.updated_at < timedelta(seconds=self.stale_after)
+
+    async def discard_file(
+        self,
+        id_course: int,
+        id_file: int,
+        stored_path: str | None,
+        drop_collection: bool = False,
+    ) -> None:
+        """
+        Remove a deleted file's vectors and upload. With `drop_collection`
+        the course had no other files and its collection goes entirely.
+        """
+        name = course_collection_name(id_course)
+        if drop_collection:
+            await asyncio.to_thread(vector_store.drop_collection, name)
+            await asyncio.to_thread(lexical_store.drop, name)
+        else:
+            await asyncio.to_thread(vector_store.delete_where, name, {"id_file": id_file})
+            await asyncio.to_thread(self._unindex_file, name, id_file)
+        await self.remove_upload(stored_path)
+
+    @staticmethod
+    def _unindex_file(collection_name: str, id_file: int) -> None:
+        with lexical_store.edit(collection_name) as lexical:
+            lexical.remove_prefix(f"file{id_file}_")
+
+    def submit(self, id_file: int) -> None:
+        task = asyncio.create_task(self._guarded(id_file), name=f"ingest-{id_file}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # ─── Pipeline ────────────────────────────────────────────────────────────
+
+    async def _guarded(self, id_file: int) -> None:
+        async with self._slots:
+            started = time.perf_counter()
+            try:
+                await self._ingest(id_file)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("Ingestion of file %s failed", id_file)
+                ingestion_files.inc(result=FAILED)
+                await self._update(id_file, status=FAILED, error=repr(exc))
+            else:
+                ingestion_files.inc(result=DONE)
+                ingestion_seconds.observe(time.perf_counter() - started)
+
+    async def _claim(self, id_file: int):
+        async with async_session() as session:
+            row = (await session.execute(
+                update(CourseFile)
+                .where(CourseFile.id_file == id_file, CourseFile.status == PENDING)
+                .values(status=RUNNING, updated_at=datetime.utcnow())
+                .returning(
+                    CourseFile.stored_path, CourseFile.file_name, CourseFile.id_course
+                )
+            )).one_or_none()
+            await session.commit()
+        return row
+
+    async def _ingest(self, id_file: int) -> None:
+        # another process may have taken it already
+        claimed = await self._claim(id_file)
+        if claimed is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        path = claimed.stored_path
+        collection_name = course_collection_name(claimed.id_course)
+
+        # what the previous version of this file left behind: one row per
+        # (page content, chunk), so unchanged pages map back to their chunks
+        async with async_session() as session:
+            rows = (await session.execute(
+                select(FileChunk.page_hash, FileChunk.chunk_id, FileChunk.page)
+                .where(FileChunk.id_file == id_file)
+                .order_by(FileChunk.page)
+            )).all()
+        state = _FileChunks(rows)
+
+        pages_total = await loop.run_in_executor(self._pool, count_pages, path)
+        await self._update(id_file, pages_total=pages_total)
+
+        def extract(start: int):
+            return loop.run_in_executor(
+                self._pool, extract_page_chunks, path,
+                start, start + self.page_window,
+                self.chunk_size, self.chunk_overlap, state.known_page_hashes,
+            )
+
+        embedded = 0
+        pages_done = 0
+        next_window = extract(0) if pages_total else None
+        for start in range(0, pages_total, self.page_window):
+            pages = await next_window
+            if start + self.page_window < pages_total:
+                next_window = extract(start + self.page_window)
+
+            embedded += await self._store(id_file, collection_name, pages, state)
+            pages_done += len(pages)
+            await self._update(
+                id_file, pages_done=pages_done, chunks_done=len(state.first_page)
+            )
+
+        # whatever the new version no longer contains
+        vanished_chunks = [
+            cid for cid in state.previous_page if cid not in state.first_page
+        ]
+        vanished_rows = [key for key in state.previous_rows if key not in state.rows]
+        await asyncio.to_thread(delete_chunks, collection_name, vanished_chunks)
+        # every chunk the file keeps, not just this run's: an earlier run
+        # may have died after storing vectors but before indexing them
+        await asyncio.to_thread(
+            sync_lexical_index, collection_name, list(state.first_page), vanished_chunks
+        )
+        async with async_session() as session:
+            if vanished_rows:
+                await session.execute(
+                    delete(FileChunk).where(
+                        FileChunk.id_file == id_file,
+                        tuple_(FileChunk.page_hash, FileChunk.chunk_id).in_(vanished_rows),
+                    )
+                )
+            await session.execute(
+                update(CourseFile)
+                .where(CourseFile.id_file == id_file)
+                .values(status=DONE, updated_at=datetime.utcnow())
+            )
+            await session.commit()
+
+        logger.info(
+            "Ingested file %s: %d pages, %d chunks (%d embedded, %d removed)",
+            id_file, pages_done, len(state.first_page), embedded, len(vanished_chunks),
+        )
+
+    async def _store(
+        self,
+        id_file: int,
+        collection_name: str,
+        pages,
+        state: "_FileChunks",
+    ) -> int:
+        """
+        Embed and store the chunks of `pages` the collection does not have
+        yet and record every chunk of these pages. Returns how many chunks
+        were embedded.
+        """
+        owner = f"file{id_file}"
+        new_chunks = []     # (chunk id, text, page)
+        new_rows = []       # (page hash, chunk id, page)
+        moved_rows = []     # (page hash, chunk id, page)
+        relabel = []        # (chunk id, page): kept chunks whose first page moved
+        for page, page_hash, chunks in pages:
+            if chunks is None:
+                # page unchanged: its chunks are stored already
+                candidates = [(cid, None) for cid in state.chunks_of_page[page_hash]]
+            else:
+                candidates = [
+                    (chunk_id(owner, content_hash(text)), text) for text in chunks
+                ]
+
+            for cid, text in candidates:
+                if cid not in state.first_page:
+                    state.first_page[cid] = page
+                    if cid not in state.previous_page:
+                        new_chunks.append((cid, text, page))
+                    elif state.previous_page[cid] != page:
+                        relabel.append((cid, page))
+
+                key = (page_hash, cid)
+                if key in state.rows:
+                    continue
+                state.rows.add(key)
+                if key not in state.previous_rows:
+                    new_rows.append((page_hash, cid, page))
+                elif state.previous_rows[key] != page:
+                    moved_rows.append((page_hash, cid, page))
+
+        for start in range(0, len(new_chunks), self.embed_batch):
+            batch = new_chunks[start:start + self.embed_batch]
+            texts = [text for _, text, _ in batch]
+            embeddings = await asyncio.to_thread(embedding_registry.embed, texts)
+            await asyncio.to_thread(
+                store_chunks_with_precomputed_embeddings,
+                texts,
+                embeddings,
+                owner,
+                collection_name,
+                [cid for cid, _, _ in batch],
+                [{"id_file": id_file, "page": page} for _, _, page in batch],
+            )
+
+        await asyncio.to_thread(
+            update_chunk_metadatas,
+            collection_name,
+            [cid for cid, _ in relabel],
+            [{"id_file": id_file, "page": page} for _, page in relabel],
+        )
+
+        # recorded after the vectors are stored, so a crash in between only
+        # costs a re-embed on the next upload
+        async with async_session() as session:
+            if new_rows:
+                await session.execute(
+                    insert(FileChunk),
+                    [
+                        {"id_file": id_file, "page_hash": page_hash, "chunk_id": cid, "page": page}
+                        for page_hash, cid, page in new_rows
+                    ],
+                )
+            if moved_rows:
+                # one executemany; a page inserted early shifts every row
+                table = FileChunk.__table__
+                await session.execute(
+                    update(table)
+                    .where(
+                        table.c.id_file == id_file,
+                        table.c.page_hash == bindparam("b_page_hash"),
+                        table.c.chunk_id == bindparam("b_chunk_id"),
+                    )
+                    .values(page=bindparam("b_page")),
+                    [
+                        {"b_page_hash": page_hash, "b_chunk_id": cid, "b_page": page}
+                        for page_hash, cid, page in moved_rows
+                    ],
+                )
+            await session.commit()
+
+        return len(new_chunks)
+
+    async def _update(self, id_file: int, **values) -> None:
+        async with async_session() as session:
+            await session.execute(
+                update(CourseFile)
+                .where(CourseFile.id_file == id_file)
+                .values(updated_at=datetime.utcnow(), **values)
+            )
+            await session.commit()
+
+
+ingestion_pipeline = IngestionPipeline(
+    workers=Settings.ingestion_workers,
+    page_window=Settings.ingestion_page_window,
+    embed_batch=Settings.ingestion_embed_batch,
+    chunk_size=Settings.ingestion_chunk_size,
+    chunk_overlap=Settings.ingestion_chunk_overlap,
+    upload_chunk_bytes=Settings.ingestion_upload_chunk_bytes,
+    max_upload_bytes=Settings.ingestion_max_upload_bytes,
+    stale_after=Settings.ingestion_stale_after,
+)
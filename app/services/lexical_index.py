@@ -0,0 +1,212 @@
+# app/services/lexical_index.py
+
+import fcntl
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from cachetools import LRUCache
+
+from app.core.settings import Settings
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the chunks of one collection.
+
+    The forward index (chunk id -> term frequencies) is what gets persisted;
+    the postings used for scoring are rebuilt from it on load.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                self._remove(doc_id)
+                self._insert(doc_id, dict(Counter(tokenize(text))))
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+    def remove_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for doc_id in [d for d in self._docs if d.startswith(prefix)]:
+                self._remove(doc_id)
+
+    def _insert(self, doc_id: str, terms: dict[str, int]) -> None:
+        self._docs[doc_id] = terms
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove(self, doc_id: str) -> None:
+        terms = self._docs.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, top_k: int) -> List[tuple[str, float]]:
+        with self._lock:
+            n = len(self._docs)
+            if n == 0:
+                return []
+            avg_length = self._total_length / n
+            scores: dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def dump(self) -> dict:
+        with self._lock:
+            return {"k1": self.k1, "b": self.b, "docs": dict(self._docs)}
+
+    @classmethod
+    def load(cls, data: dict) -> "BM25Index":
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        for doc_id, terms in data["docs"].items():
+            index._insert(doc_id, terms)
+        return index
+
+
+class LexicalIndexStore:
+    """
+    BM25 indexes by collection name, persisted as JSON under `path` and
+    kept in an LRU. An index saved by another process is reloaded when its
+    file changes. Writers go through `edit`, which serialises them across
+    processes.
+    """
+
+    def __init__(self, path: Path, cache_size: int = 32):
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        # name -> (index, mtime of the file it was loaded from)
+        self._indexes: LRUCache = LRUCache(maxsize=cache_size)
+
+    def _file(self, name: str) -> Path:
+        return self._path / f"{name}.json"
+
+    def get(self, name: str) -> BM25Index:
+        """
+        The collection's index; empty if nothing has been indexed yet.
+        """
+        file = self._file(name)
+        try:
+            mtime = file.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        with self._lock:
+            cached = self._indexes.get(name)
+        if cached is not None and (mtime is None or cached[1] == mtime):
+            return cached[0]
+
+        index = self._read(file) if mtime is not None else BM25Index()
+        with self._lock:
+            self._indexes[name] = (index, mtime)
+        return index
+
+    @contextmanager
+    def edit(self, name: str) -> Iterator[BM25Index]:
+        """
+        Load, change and save the collection's index under an exclusive
+        lock on its file. The index is re-read from disk inside the lock,
+        so concurrent writers, in this process or another, keep each
+        other's changes. Nothing is saved if the block raises.
+        """
+        self._path.mkdir(parents=True, exist_ok=True)
+        file = self._file(name)
+        with open(file.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self._read(file) if file.exists() else BM25Index()
+                yield index
+                self.save(name, index)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(file: Path) -> BM25Index:
+        with open(file, encoding="utf-8") as f:
+            return BM25Index.load(json.load(f))
+
+    def save(self, name: str, index: BM25Index) -> None:
+        """
+        Replace the stored index; use `edit` unless `index` is complete.
+        """
+        self._path.mkdir(parents=True, exist_ok=True)
+        file = self._file(name)
+        tmp = file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index.dump(), f, ensure_ascii=False)
+        os.replace(tmp, file)
+        with self._lock:
+            self._indexes[name] = (index, file.stat().st_mtime)
+
+    def drop(self, name: str) -> None:
+        with self._lock:
+            self._indexes.pop(name, None)
+        # the lock file stays: removing it under a waiting writer would let
+        # the next one lock a different file
+        try:
+            self._file(name).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """
+    Merge ranked id lists; an id scores sum(1 / (k + rank)) over the lists.
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+lexical_store = LexicalIndexStore(
+    path=Settings.lexical_index_path,
+    cache_size=Settings.vector_collection_cache_size,
+)
@@ -0,0 +1,54 @@
+# app/services/pdf_pages.py
+#
+# Runs inside ingestion worker processes: keep imports light, no app state.
+
+import hashlib
+from typing import Collection, List
+
+import pymupdf
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+
+def count_pages(pdf_path: str) -> int:
+    with pymupdf.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def page_hash(text: str, chunk_size: int, overlap: int) -> str:
+    # the chunking parameters decide which chunks a page yields, so a change
+    # of settings must invalidate the page
+    return content_hash(f"{chunk_size}:{overlap}:{text}")
+
+
+def extract_page_chunks(
+    pdf_path: str,
+    start: int,
+    stop: int,
+    chunk_size: int = 1000,
+    overlap: int = 200,
+    known_page_hashes: Collection[str] = (),
+) -> List[tuple[int, str, List[str] | None]]:
+    """
+    Text chunks of pages [start, stop), as (page number, page hash, chunks).
+    Pages whose hash is in `known_page_hashes` are not chunked again and
+    come back with None instead of chunks.
+
+    Only these pages are loaded, so memory does not grow with the document.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=overlap
+    )
+    pages = []
+    with pymupdf.open(pdf_path) as doc:
+        for number in range(start, min(stop, doc.page_count)):
+            text = doc.load_page(number).get_text("text") or ""
+            digest = page_hash(text, chunk_size, overlap)
+            if digest in known_page_hashes:
+                pages.append((number, digest, None))
+            else:
+                pages.append((number, digest, splitter.split_text(text)))
+    return pages
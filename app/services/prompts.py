@@ -2,14 +2,13 @@
 
 from typing import List, Dict
 
-from sqlalchemy import select
+from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.quiz import Quiz
 from app.models.course import Course
 from app.models.question import Question
 from app.models.answer_option import AnswerOption
-from app.models.quiz_attempt_answer import QuizAttemptAnswer
 from app.schemas.llm import MutationPayload
 
 
@@ -33,18 +32,54 @@ async def generate_feedback_prompt(
         - text of the chosen (wrong) answer
         - text of the correct answer
       and a request for feedback.
+
+    Issues two queries however many answers there are.
     """
 
     # 1. Load quiz and course
-    quiz = await session.get(Quiz, quiz_id)
-    if not quiz:
+    header = (await session.execute(
+        select(Quiz, Course)
+        .outerjoin(Course, Course.id_course == Quiz.id_course)
+        .where(Quiz.id_quiz == quiz_id)
+    )).one_or_none()
+    if header is None:
         raise ValueError(f"Quiz {quiz_id} not found")
 
-    course = await session.get(Course, quiz.id_course)
+    quiz, course = header
     if not course:
         raise ValueError(f"Course {quiz.id_course} not found")
 
-    # 2. Header: course + quiz info
+    # 2. Load the answered questions with the chosen and the correct options
+    question_ids = {ans["id_question"] for ans in answers}
+    answer_ids = {ans["id_answer"] for ans in answers}
+    rows = await session.execute(
+        select(Question, AnswerOption)
+        .outerjoin(
+            AnswerOption,
+            and_(
+                AnswerOption.id_question == Question.id_question,
+                or_(
+                    AnswerOption.id_answer_option.in_(answer_ids),
+                    AnswerOption.is_correct == True,
+                ),
+            ),
+        )
+        .where(Question.id_question.in_(question_ids))
+        .order_by(Question.id_question, AnswerOption.id_answer_option)
+    )
+
+    questions: dict[int, Question] = {}
+    options: dict[int, AnswerOption] = {}
+    correct_options: dict[int, AnswerOption] = {}
+    for question, option in rows.all():
+        questions[question.id_question] = question
+        if option is None:
+            continue
+        options[option.id_answer_option] = option
+        if option.is_correct:
+            correct_options.setdefault(question.id_question, option)
+
+    # 3. Header: course + quiz info
     prompt_lines = [
         f"Course: {course.title}",
         f"{course.description or ''}",
@@ -55,18 +90,16 @@ async def generate_feedback_prompt(
         "I answered the following questions incorrectly:"
     ]
 
-    # 3. For each answer, check correctness and gather details if incorrect
+    # 4. For each answer, check correctness and gather details if incorrect
     for ans in answers:
         q_id = ans["id_question"]
         a_id = ans["id_answer"]
 
-        # load question
-        question = await session.get(Question, q_id)
+        question = questions.get(q_id)
         if not question:
             continue
 
-        # load the provided answer option
-        provided = await session.get(AnswerOption, a_id)
+        provided = options.get(a_id)
         if not provided:
             continue
 
@@ -74,16 +107,7 @@ async def generate_feedback_prompt(
         if provided.is_correct:
             continue
 
-        # load the correct answer
-        result = await session.execute(
-            select(AnswerOption)
-            .where(
-                AnswerOption.id_question == q_id,
-                AnswerOption.is_correct == True
-            )
-            .limit(1)
-        )
-        correct_option = result.scalar_one_or_none()
+        correct_option = correct_options.get(q_id)
         correct_text = correct_option.text if correct_option else "<no correct answer found>"
 
         # append details
@@ -96,7 +120,7 @@ async def generate_feedback_prompt(
             f"Correct answer: {correct_text}"
         ])
 
-    # 4. Closing instruction
+    # 5. Closing instruction
     prompt_lines.extend([
         "",
         "Please provide detailed feedback on these mistakes and how to improve."
@@ -109,9 +133,6 @@ def generate_quiz_help_prompt(payload: MutationPayload) -> str:
     """
     Generate a prompt for LLM to help teacher implement quiz.
     """
-    correct_answers = [a.text for a in payload.answers if a.is_correct]
-    incorrect_answers = [a.text for a in payload.answers if not a.is_correct]
-
     prompt = f"""You're a helpful assistant for quiz creation. The teacher is working on:
 Quiz Title: {payload.quiz_title}
 Quiz Description: {payload.quiz_description}
@@ -0,0 +1,286 @@
+# app/services/quiz_cache.py
+
+import logging
+from dataclasses import dataclass
+from typing import Protocol
+
+from cachetools import LRUCache
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.settings import Settings
+from app.models.answer_option import AnswerOption
+from app.models.question import Question
+from app.models.quiz import Quiz
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class OptionContent:
+    id_answer_option: int
+    text: str
+    is_correct: bool
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionContent:
+    id_question: int
+    title: str
+    text: str
+    study_materials: str | None
+    options: tuple[OptionContent, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class QuizContent:
+    """
+    A quiz with its questions and answer options, as created.
+    """
+    id_quiz: int
+    id_course: int
+    title: str
+    description: str | None
+    coins: int
+    min_correct_ratio: float
+    questions: tuple[QuestionContent, ...]
+
+    @property
+    def weight(self) -> int:
+        # cache budget is counted in answer options, the bulk of a quiz
+        return 1 + sum(1 + len(q.options) for q in self.questions)
+
+    def correct_options(self) -> dict[int, set[int]]:
+        """
+        id_question -> correct option ids, as grade_attempt expects.
+        """
+        return {
+            q.id_question: {o.id_answer_option for o in q.options if o.is_correct}
+            for q in self.questions
+        }
+
+
+class QuizCacheBackend(Protocol):
+    """
+    Storage behind QuizContentCache. Called from the event loop and from
+    flush/commit hooks, so implementations must be cheap and synchronous.
+    """
+
+    def get(self, id_quiz: int) -> QuizContent | None: ...
+
+    def set(self, content: QuizContent) -> None: ...
+
+    def delete(self, id_quiz: int) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def quiz_of_question(self, id_question: int) -> int | None:
+        """
+        The quiz of a question of any cached quiz, to map option writes
+        back to their quiz without a query.
+        """
+
+
+class _EvictingLRUCache(LRUCache):
+    def __init__(self, maxsize, getsizeof, on_evict):
+        super().__init__(maxsize=maxsize, getsizeof=getsizeof)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_evict(value)
+        return key, value
+
+
+class LocalQuizCacheBackend:
+    """
+    Per-process LRU, bounded by the total number of cached answer options.
+    """
+
+    def __init__(self, max_weight: int):
+        self._cache: LRUCache = _EvictingLRUCache(
+            maxsize=max_weight,
+            getsizeof=lambda content: content.weight,
+            on_evict=self._forget,
+        )
+        # questions of the cached quizzes only, so bounded along with them
+        self._question_quiz: dict[int, int] = {}
+
+    def get(self, id_quiz: int) -> QuizContent | None:
+        return self._cache.get(id_quiz)
+
+    def set(self, content: QuizContent) -> None:
+        self.delete(content.id_quiz)
+        try:
+            self._cache[content.id_quiz] = content
+        except ValueError:
+            # a single quiz larger than the whole budget; just don't cache it
+            return
+        for q in content.questions:
+            self._question_quiz[q.id_question] = content.id_quiz
+
+    def delete(self, id_quiz: int) -> None:
+        content = self._cache.pop(id_quiz, None)
+        if content is not None:
+            self._forget(content)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._question_quiz.clear()
+
+    def quiz_of_question(self, id_question: int) -> int | None:
+        return self._question_quiz.get(id_question)
+
+    def _forget(self, content: QuizContent) -> None:
+        for q in content.questions:
+            if self._question_quiz.get(q.id_question) == content.id_quiz:
+                del self._question_quiz[q.id_question]
+
+
+class QuizContentCache:
+    """
+    Read-through cache of QuizContent by id_quiz.
+
+    Writes to quiz, question or answer_option rows made through a Session
+    drop the affected quizzes once the transaction commits (see the hooks
+    below). Bulk UPDATE/DELETE statements drop everything.
+    """
+
+    def __init__(self, backend: QuizCacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, session: AsyncSession, id_quiz: int) -> QuizContent | None:
+        content = self.backend.get(id_quiz)
+        if content is not None:
+            self.hits += 1
+            return content
+
+        self.misses += 1
+        content = await load_quiz_content(session, id_quiz)
+        if content is not None:
+            self.backend.set(content)
+        return content
+
+    def quiz_of_question(self, id_question: int) -> int | None:
+        return self.backend.quiz_of_question(id_question)
+
+    def invalidate(self, id_quiz: int) -> None:
+        self.backend.delete(id_quiz)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+async def load_quiz_content(session: AsyncSession, id_quiz: int) -> QuizContent | None:
+    rows = (await session.execute(
+        select(Quiz, Question, AnswerOption)
+        .outerjoin(Question, Question.id_quiz == Quiz.id_quiz)
+        .outerjoin(AnswerOption, AnswerOption.id_question == Question.id_question)
+        .where(Quiz.id_quiz == id_quiz)
+        .order_by(Question.id_question, AnswerOption.id_answer_option)
+    )).all()
+    if not rows:
+        return None
+
+    quiz = rows[0][0]
+    questions: dict[int, tuple[Question, list[OptionContent]]] = {}
+    for _, question, option in rows:
+        if question is None:
+            continue
+        _, options = questions.setdefault(question.id_question, (question, []))
+        if option is not None:
+            options.append(OptionContent(
+                id_answer_option=option.id_answer_option,
+                text=option.text,
+                is_correct=option.is_correct,
+            ))
+
+    return QuizContent(
+        id_quiz=quiz.id_quiz,
+        id_course=quiz.id_course,
+        title=quiz.title,
+        description=quiz.description,
+        coins=quiz.coins,
+        min_correct_ratio=quiz.min_correct_ratio,
+        questions=tuple(
+            QuestionContent(
+                id_question=q.id_question,
+                title=q.title,
+                text=q.text,
+                study_materials=q.study_materials,
+                options=tuple(options),
+            )
+            for q, options in questions.values()
+        ),
+    )
+
+
+quiz_content_cache = QuizContentCache(
+    LocalQuizCacheBackend(max_weight=Settings.quiz_cache_max_options)
+)
+
+
+# ─── Invalidation ────────────────────────────────────────────────────────────
+# Stale quiz ids are collected on the session while it writes and applied on
+# commit, so a concurrent reader cannot re-cache rows that are about to change.
+
+_STALE_KEY = "quiz_cache_stale"
+_ALL = "all"
+
+
+def _mark(session: Session, id_quiz: int | None) -> None:
+    stale = session.info.setdefault(_STALE_KEY, set())
+    if id_quiz is not None and stale != _ALL:
+        stale.add(id_quiz)
+
+
+def _mark_row(session: Session, mapper_class, values: dict) -> None:
+    if mapper_class is Quiz or mapper_class is Question:
+        _mark(session, values.get("id_quiz"))
+    elif mapper_class is AnswerOption and values.get("id_question") is not None:
+        _mark(session, quiz_content_cache.quiz_of_question(values["id_question"]))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Quiz, Question)):
+            _mark(session, obj.id_quiz)
+        elif isinstance(obj, AnswerOption):
+            _mark(session, quiz_content_cache.quiz_of_question(obj.id_question))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_executed(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (Quiz, Question, AnswerOption):
+        return
+
+    session = orm_execute_state.session
+    if orm_execute_state.is_insert:
+        params = orm_execute_state.parameters or []
+        for values in params if isinstance(params, list) else [params]:
+            _mark_row(session, mapper.class_, values)
+    else:
+        session.info[_STALE_KEY] = _ALL
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_stale(session: Session) -> None:
+    stale = session.info.pop(_STALE_KEY, None)
+    if stale == _ALL:
+        quiz_content_cache.clear()
+    elif stale:
+        for id_quiz in stale:
+            quiz_content_cache.invalidate(id_quiz)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale(session: Session) -> None:
+    session.info.pop(_STALE_KEY, None)
@@ -0,0 +1,111 @@
+# app/services/quiz_notify.py
+
+import asyncio
+import json
+import logging
+from typing import Callable
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+
+async def publish_quiz_result(
+    session: AsyncSession, id_user: int, id_quiz: int
+) -> None:
+    """
+    Queue a NOTIFY in the caller's transaction; Postgres delivers it to
+    every listening process on commit and drops it on rollback.
+    """
+    payload = json.dumps({"id_user": id_user, "id_quiz": id_quiz})
+    await session.execute(
+        select(func.pg_notify(Settings.quiz_result_channel, payload))
+    )
+
+
+class QuizResultListener:
+    """
+    One LISTEN connection per process. Every notification is passed to the
+    registered handlers as the affected `id_user`; after a reconnect they
+    are called with None, since anything sent meanwhile was lost.
+    """
+
+    def __init__(self, dsn: str, channel: str, reconnect_delay: float = 5.0):
+        self._dsn = dsn
+        self._channel = channel
+        self._reconnect_delay = reconnect_delay
+        self._handlers: list[Callable[[int | None], None]] = []
+        self._task: asyncio.Task | None = None
+        self._connection: asyncpg.Connection | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    def add_handler(self, handler: Callable[[int | None], None]) -> None:
+        self._handlers.append(handler)
+
+    def remove_handler(self, handler: Callable[[int | None], None]) -> None:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    def _wake(self, id_user: int | None) -> None:
+        for handler in self._handlers:
+            handler(id_user)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            id_user = json.loads(payload)["id_user"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Malformed %s payload: %r", channel, payload)
+            return
+        self._wake(id_user)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="quiz-result-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                connection = await asyncpg.connect(self._dsn)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("Quiz result listener cannot connect: %r", exc)
+                await asyncio.sleep(self._reconnect_delay)
+                continue
+
+            closed = asyncio.get_running_loop().create_future()
+            # bound now: a late callback of an old connection must not
+            # resolve a later connection's future
+            connection.add_termination_listener(
+                lambda _, closed=closed: closed.done() or closed.set_result(None)
+            )
+            try:
+                await connection.add_listener(self._channel, self._on_notify)
+                self._connection = connection
+                # anything published while we were away was lost; re-check
+                self._wake(None)
+                await closed
+                logger.warning("Quiz result listener connection lost")
+            except asyncpg.PostgresError as exc:
+                logger.warning("Quiz result listener failed: %r", exc)
+            finally:
+                self._connection = None
+                if not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self._reconnect_delay)
+
+
+quiz_result_listener = QuizResultListener(
+    dsn=settings.get_dsn(),
+    channel=Settings.quiz_result_channel,
+)
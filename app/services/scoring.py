@@ -0,0 +1,141 @@
+# app/services/scoring.py
+
+import asyncio
+import logging
+from typing import Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import async_session
+from app.models.answer_option import AnswerOption
+from app.models.question import Question
+from app.models.quiz import Quiz
+from app.models.quiz_attempt import QuizAttempt
+from app.models.quiz_attempt_answer import QuizAttemptAnswer
+
+logger = logging.getLogger(__name__)
+
+
+def grade_attempt(
+    correct_options: dict[int, set[int]],
+    selected: dict[int, int],
+    min_correct_ratio: float,
+) -> dict:
+    """
+    Score an attempt.
+
+    - correct_options: id_question -> ids of its correct options, for every
+      question of the quiz
+    - selected: id_question -> chosen id_answer_option
+
+    Returns the values for QuizAttempt's score columns.
+    """
+    total = len(correct_options)
+    correct = sum(
+        1
+        for id_question, options in correct_options.items()
+        if selected.get(id_question) in options
+    )
+    ratio = correct / total if total > 0 else 0.0
+    return {
+        "correct_count": correct,
+        "total_count": total,
+        "correct_ratio": ratio,
+        "passed": ratio >= min_correct_ratio if total > 0 else False,
+    }
+
+
+async def load_correct_options(
+    session: AsyncSession, quiz_ids: Iterable[int]
+) -> dict[int, dict[int, set[int]]]:
+    """
+    id_quiz -> id_question -> correct option ids, for all given quizzes.
+    """
+    rows = await session.execute(
+        select(Question.id_quiz, Question.id_question, AnswerOption.id_answer_option)
+        .outerjoin(
+            AnswerOption,
+            (AnswerOption.id_question == Question.id_question)
+            & (AnswerOption.is_correct == True),
+        )
+        .where(Question.id_quiz.in_(set(quiz_ids)))
+    )
+    result: dict[int, dict[int, set[int]]] = {}
+    for id_quiz, id_question, id_answer_option in rows.all():
+        options = result.setdefault(id_quiz, {}).setdefault(id_question, set())
+        if id_answer_option is not None:
+            options.add(id_answer_option)
+    return result
+
+
+async def backfill_attempt_scores(batch_size: int = 500) -> int:
+    """
+    Fill score columns of attempts submitted before they existed.
+    Runs in batches, one transaction each, so it can be interrupted and
+    restarted at any time. Returns the number of attempts scored.
+    """
+    scored = 0
+    last_id = 0
+    while True:
+        async with async_session() as session:
+            attempts = (await session.execute(
+                select(
+                    QuizAttempt.id_quiz_attempt,
+                    QuizAttempt.id_quiz,
+                    Quiz.min_correct_ratio,
+                )
+                .join(Quiz, Quiz.id_quiz == QuizAttempt.id_quiz)
+                .where(
+                    QuizAttempt.total_count.is_(None),
+                    QuizAttempt.id_quiz_attempt > last_id,
+                )
+                .order_by(QuizAttempt.id_quiz_attempt)
+                .limit(batch_size)
+            )).all()
+            if not attempts:
+                return scored
+            last_id = attempts[-1].id_quiz_attempt
+
+            answers = await session.execute(
+                select(
+                    QuizAttemptAnswer.id_quiz_attempt,
+                    QuizAttemptAnswer.id_question,
+                    QuizAttemptAnswer.id_answer_option,
+                )
+                .where(QuizAttemptAnswer.id_quiz_attempt.in_(
+                    [a.id_quiz_attempt for a in attempts]
+                ))
+            )
+            selected: dict[int, dict[int, int]] = {}
+            for id_quiz_attempt, id_question, id_answer_option in answers.all():
+                selected.setdefault(id_quiz_attempt, {})[id_question] = id_answer_option
+
+            correct_options = await load_correct_options(
+                session, {a.id_quiz for a in attempts}
+            )
+
+            await session.execute(
+                update(QuizAttempt),
+                [
+                    {
+                        "id_quiz_attempt": a.id_quiz_attempt,
+                        **grade_attempt(
+                            correct_options.get(a.id_quiz, {}),
+                            selected.get(a.id_quiz_attempt, {}),
+                            a.min_correct_ratio,
+                        ),
+                    }
+                    for a in attempts
+                ],
+            )
+            await session.commit()
+
+        scored += len(attempts)
+        logger.info("Scored %d attempts (up to id %d)", scored, last_id)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    total = asyncio.run(backfill_attempt_scores())
+    print(f"✔ Backfilled scores for {total} attempts")
@@ -0,0 +1,258 @@
+# app/services/sse_broker.py
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.core.settings import Settings
+from app.db.session import async_session, use_read_session
+from app.models.handle_quiz_attempt import HandleQuizAttempt
+from app.models.quiz_attempt import QuizAttempt
+from app.services.quiz_notify import quiz_result_listener
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = ": ping\n\n"
+
+
+class ConnectionLimitExceeded(Exception):
+    def __init__(self, detail: str, per_user: bool):
+        super().__init__(detail)
+        self.detail = detail
+        self.per_user = per_user
+
+
+class SSEConnection:
+    __slots__ = ("id_user", "queue")
+
+    def __init__(self, id_user: int, queue_size: int):
+        self.id_user = id_user
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+
+    def send(self, message: str) -> bool:
+        """
+        Queue `message` unless the client has fallen this far behind;
+        returns whether it was queued.
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+
+class SSEBroker:
+    """
+    Registry of open quiz-result streams, driven by a single timer.
+
+    Each tick the broker sends heartbeats when due and looks for unhandled
+    quiz results with one query for all users that need checking: users
+    woken by NOTIFY on every tick, everybody else only on the poll
+    interval. Streams themselves just drain their queue.
+    """
+
+    def __init__(
+        self,
+        tick_interval: float = 1.0,
+        heartbeat_interval: float = 15.0,
+        poll_interval: float = 1.0,
+        fallback_poll_interval: float = 15.0,
+        max_per_user: int = 5,
+        max_total: int = 50000,
+        queue_size: int = 32,
+    ):
+        self.tick_interval = tick_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.fallback_poll_interval = fallback_poll_interval
+        self.max_per_user = max_per_user
+        self.max_total = max_total
+        self.queue_size = queue_size
+        self._connections: dict[int, set[SSEConnection]] = {}
+        self._total = 0
+        self._dirty: set[int] = set()
+        self._poll_all = True
+        self._last_poll = 0.0
+        self._last_heartbeat = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def total_connections(self) -> int:
+        return self._total
+
+    @property
+    def connected_users(self) -> int:
+        return len(self._connections)
+
+    # ─── Registry ────────────────────────────────────────────────────────────
+
+    def connect(self, id_user: int) -> SSEConnection:
+        streams = self._connections.get(id_user, ())
+        if len(streams) >= self.max_per_user:
+            raise ConnectionLimitExceeded(
+                f"At most {self.max_per_user} result streams per user", per_user=True
+            )
+        if self._total >= self.max_total:
+            raise ConnectionLimitExceeded(
+                "Too many open result streams", per_user=False
+            )
+
+        connection = SSEConnection(id_user, self.queue_size)
+        self._connections.setdefault(id_user, set()).add(connection)
+        self._total += 1
+        # deliver anything that finished while the user was away
+        self._dirty.add(id_user)
+        return connection
+
+    def disconnect(self, connection: SSEConnection) -> None:
+        streams = self._connections.get(connection.id_user)
+        if streams is None or connection not in streams:
+            return
+        streams.discard(connection)
+        self._total -= 1
+        if not streams:
+            del self._connections[connection.id_user]
+
+    def wake(self, id_user: int | None) -> None:
+        """
+        Check `id_user` (or everyone, for None) on the next tick.
+        """
+        if id_user is None:
+            self._poll_all = True
+        elif id_user in self._connections:
+            self._dirty.add(id_user)
+
+    # ─── Timer ───────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        quiz_result_listener.add_handler(self.wake)
+        self._task = asyncio.create_task(self._run(), name="sse-broker")
+
+    async def stop(self) -> None:
+        quiz_result_listener.remove_handler(self.wake)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._tick()
+            except Exception:
+                logger.exception("SSE broker tick failed")
+            await asyncio.sleep(self.tick_interval)
+
+    async def _tick(self) -> None:
+        now = time.monotonic()
+
+        if now - self._last_heartbeat >= self.heartbeat_interval:
+            self._last_heartbeat = now
+            for streams in self._connections.values():
+                for connection in streams:
+                    connection.send(HEARTBEAT)
+
+        interval = (
+            self.fallback_poll_interval
+            if quiz_result_listener.connected
+            else self.poll_interval
+        )
+        if self._poll_all or now - self._last_poll >= interval:
+            self._poll_all = False
+            self._last_poll = now
+            self._dirty.clear()
+            await self._check(None)
+        elif self._dirty:
+            users, self._dirty = self._dirty, set()
+            await self._check(users)
+
+    async def _check(self, users: set[int] | None) -> None:
+        """
+        Deliver unhandled quiz results of `users` (all connected users when
+        None) and mark them handled.
+        """
+        if not self._connections:
+            return
+
+        pending_q = (
+            select(QuizAttempt.id_user)
+            .join(
+                HandleQuizAttempt,
+                HandleQuizAttempt.id_quiz_attempt == QuizAttempt.id_quiz_attempt,
+            )
+            .where(HandleQuizAttempt.handled == False)
+            .distinct()
+        )
+        if users is not None:
+            pending_q = pending_q.where(QuizAttempt.id_user.in_(users))
+
+        # the periodic sweep may read from the replica, since the claim below
+        # re-checks `handled` on the primary; users woken by NOTIFY are
+        # checked on the primary, the replica may not have their row yet
+        read_session = async_session if users is not None else await use_read_session()
+        async with read_session() as session:
+            pending = set((await session.execute(pending_q)).scalars().all())
+        # only claim results somebody here can receive right now
+        pending = {
+            id_user for id_user in pending
+            if any(not c.queue.full() for c in self._connections.get(id_user, ()))
+        }
+        if not pending:
+            return
+
+        async with async_session() as session:
+            # core table: the ORM form would RETURNING the handle PK instead
+            claimed = await session.execute(
+                update(HandleQuizAttempt.__table__)
+                .where(
+                    HandleQuizAttempt.id_quiz_attempt == QuizAttempt.id_quiz_attempt,
+                    HandleQuizAttempt.handled == False,
+                    QuizAttempt.id_user.in_(pending),
+                )
+                .values(handled=True)
+                .returning(
+                    QuizAttempt.id_quiz_attempt, QuizAttempt.id_user, QuizAttempt.id_quiz
+                )
+            )
+            results = claimed.all()
+            await session.commit()
+
+        undelivered = []
+        for id_quiz_attempt, id_user, id_quiz in results:
+            payload = {
+                "quiz_id": id_quiz,
+                "time": datetime.utcnow().isoformat() + "Z"
+            }
+            message = f"event: quiz_result\ndata: {json.dumps(payload)}\n\n"
+            # every send must run, so no any() short-circuit here
+            sent = [
+                connection.send(message)
+                for connection in self._connections.get(id_user, ())
+            ]
+            if not any(sent):
+                undelivered.append(id_quiz_attempt)
+
+        if undelivered:
+            # all the user's streams were full or gone by now; a later
+            # check delivers these
+            async with async_session() as session:
+                await session.execute(
+                    update(HandleQuizAttempt)
+                    .where(HandleQuizAttempt.id_quiz_attempt.in_(undelivered))
+                    .values(handled=False)
+                )
+                await session.commit()
+
+
+sse_broker = SSEBroker(
+    tick_interval=Settings.sse_tick_interval,
+    heartbeat_interval=Settings.sse_heartbeat_interval,
+    poll_interval=Settings.sse_poll_interval,
+    fallback_poll_interval=Settings.sse_fallback_poll_interval,
+    max_per_user=Settings.sse_max_connections_per_user,
+    max_total=Settings.sse_max_connections,
+)
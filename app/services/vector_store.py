@@ -0,0 +1,129 @@
+# app/services/vector_store.py
+
+import threading
+import time
+
+from cachetools import LRUCache
+from chromadb import PersistentClient
+from chromadb.api import ClientAPI
+from chromadb.api.models.Collection import Collection
+from chromadb.errors import NotFoundError
+
+from app.core.metrics import metrics
+from app.core.settings import Settings
+
+vector_query_seconds = metrics.histogram(
+    "vector_query_duration_seconds", "Time spent in one nearest-neighbour query"
+)
+
+
+def course_collection_name(id_course: int) -> str:
+    """
+    Every course has its own collection, created by its first ingested file.
+    """
+    return f"course_{id_course}"
+
+
+class VectorStore:
+    """
+    Long-lived ChromaDB client with an LRU cache of collection handles.
+
+    Collection handles are cheap to keep but cost a round trip through the
+    sysdb to resolve, so retrieval reuses them until the collection is
+    dropped through `drop_collection` or a query reports it missing.
+    """
+
+    def __init__(self, path: str, cache_size: int = 128):
+        self._path = path
+        self._client: ClientAPI | None = None
+        self._lock = threading.Lock()
+        self._collections: LRUCache = LRUCache(maxsize=cache_size)
+
+    @property
+    def client(self) -> ClientAPI:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = PersistentClient(path=self._path)
+        return self._client
+
+    def get_collection(self, name: str) -> Collection:
+        """
+        Return a cached handle; raises NotFoundError if the collection is absent.
+        """
+        with self._lock:
+            collection = self._collections.get(name)
+        if collection is not None:
+            return collection
+
+        collection = self.client.get_collection(name=name)
+        with self._lock:
+            self._collections[name] = collection
+        return collection
+
+    def get_or_create_collection(self, name: str) -> Collection:
+        with self._lock:
+            collection = self._collections.get(name)
+        if collection is not None:
+            return collection
+
+        collection = self.client.get_or_create_collection(name=name)
+        with self._lock:
+            self._collections[name] = collection
+        return collection
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self._collections.pop(name, None)
+
+    def drop_collection(self, name: str) -> None:
+        self.invalidate(name)
+        try:
+            self.client.delete_collection(name=name)
+        except NotFoundError:
+            pass
+
+    def query(self, name: str, query_embeddings, n_results: int) -> dict:
+        collection = self.get_collection(name)
+        started = time.perf_counter()
+        try:
+            return collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+            )
+        except NotFoundError:
+            # dropped behind our back (e.g. by another worker)
+            self.invalidate(name)
+            raise
+        finally:
+            vector_query_seconds.observe(time.perf_counter() - started)
+
+    def get_documents(self, name: str, ids: list[str]) -> dict[str, str]:
+        """
+        id -> document text for the ids that exist.
+        """
+        if not ids:
+            return {}
+        found = self.get_collection(name).get(ids=ids, include=["documents"])
+        return dict(zip(found["ids"], found["documents"]))
+
+    def delete_where(self, name: str, where: dict) -> None:
+        """
+        Delete the vectors matching a metadata filter; a missing collection
+        has nothing to delete.
+        """
+        try:
+            self.get_collection(name).delete(where=where)
+        except NotFoundError:
+            self.invalidate(name)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._collections.clear()
+            self._client = None
+
+
+vector_store = VectorStore(
+    path=str(Settings.db_path),
+    cache_size=Settings.vector_collection_cache_size,
+)
@@ -0,0 +1,97 @@
+"""
+Per-request authentication overhead.
+
+Creates a throwaway user in the configured database and times
+`get_current_user` for the same bearer token three ways: a user lookup
+on every request (the old behaviour), a warm token cache, and trusted
+`uid` claims with an empty cache. Also counts the SQL statements each
+way issues.
+
+    python test/bench_auth.py --requests 2000
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, event
+
+from app.core import auth
+from app.core.settings import Settings
+from app.core.user_cache import user_cache
+from app.db.session import async_session, engine
+from app.models.user import User
+
+statements = 0
+
+
+def count_statement(*_):
+    global statements
+    statements += 1
+
+
+def report(name: str, samples: list[float], queries: int) -> None:
+    us = sorted(s * 1e6 for s in samples)
+    p95 = us[int(len(us) * 0.95) - 1]
+    print(
+        f"{name:<14} mean={statistics.mean(us):9.1f}us "
+        f"p50={statistics.median(us):9.1f}us p95={p95:9.1f}us "
+        f"queries/request={queries / len(samples):.2f}"
+    )
+
+
+async def run(name: str, token: str, requests: int, clear_cache: bool) -> None:
+    global statements
+    samples = []
+    statements = 0
+    for _ in range(requests):
+        if clear_cache:
+            user_cache.clear()
+        async with async_session() as session:
+            started = time.perf_counter()
+            await auth.get_current_user(token, session)
+            samples.append(time.perf_counter() - started)
+    report(name, samples, statements)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    username = f"bench_{uuid.uuid4().hex[:12]}"
+    async with async_session() as session:
+        user = User(
+            username=username,
+            password_hash="-",
+            email=f"{username}@bench.local",
+            first_name="Bench",
+            second_name="User",
+        )
+        session.add(user)
+        await session.commit()
+        id_user = user.id_user
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    token = auth.generate_token(username, id_user)
+    try:
+        Settings.auth_trust_token_claims = False
+        await run("db lookup", token, args.requests, clear_cache=True)
+        await run("token cache", token, args.requests, clear_cache=False)
+        Settings.auth_trust_token_claims = True
+        await run("uid claims", token, args.requests, clear_cache=True)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+        async with async_session() as session:
+            await session.execute(delete(User).where(User.id_user == id_user))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Query embedding throughput: one ONNX call per request vs micro-batching.
+
+Fires `--requests` concurrent single-query embeds, `--concurrency` at a
+time, first each on its own thread (what /llm/get used to do) and then
+through an EmbeddingBatcher, and reports throughput and per-request
+latency.
+
+    python test/bench_embedding_batcher.py --requests 2000 --concurrency 64 --window 0.005
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.embeddings import EmbeddingBatcher, embedding_registry
+
+
+def report(name: str, elapsed: float, latencies: list[float]) -> None:
+    ms = sorted(s * 1000 for s in latencies)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(
+        f"{name:<10} {len(ms) / elapsed:8.1f} req/s  "
+        f"p50={statistics.median(ms):7.2f}ms p95={p95:7.2f}ms"
+    )
+
+
+async def run(name: str, requests: int, concurrency: int, embed) -> None:
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int):
+        async with slots:
+            started = time.perf_counter()
+            await embed(f"what is question {i} about?")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    report(name, time.perf_counter() - started, latencies)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--window", type=float, default=0.005)
+    parser.add_argument("--max-batch", type=int, default=32)
+    args = parser.parse_args()
+
+    embedding_registry.load()
+    batcher = EmbeddingBatcher(
+        embedding_registry, window=args.window, max_batch=args.max_batch
+    )
+
+    async def single(text):
+        return (await asyncio.to_thread(embedding_registry.embed, [text]))[0]
+
+    await run("single", args.requests, args.concurrency, single)
+    await run("batched", args.requests, args.concurrency, batcher.embed)
+    print(batcher.stats())
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Login storm: event-loop stall while many bcrypt checks run at once.
+
+Fires `--logins` concurrent password verifications, first inline (what
+/user/token used to do) and then through `auth.password_hasher`, while a
+probe task measures how late the event loop wakes it up — i.e. how long
+every other request on the worker would have waited.
+
+    python test/bench_login_storm.py --logins 300 --workers 4 --max-queue 64
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import HTTPException
+
+from app.core import auth
+
+PROBE_INTERVAL = 0.01
+
+
+async def probe(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+def report(name: str, elapsed: float, lags: list[float], rejected: int) -> None:
+    ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = ms[max(int(len(ms) * 0.99) - 1, 0)]
+    print(
+        f"{name:<8} wall={elapsed:7.2f}s loop lag p50={statistics.median(ms):8.1f}ms "
+        f"p99={p99:8.1f}ms max={ms[-1]:8.1f}ms rejected={rejected}"
+    )
+
+
+async def storm(name: str, logins: int, check) -> None:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(check() for _ in range(logins)), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await prober
+    rejected = sum(
+        1 for r in results
+        if isinstance(r, HTTPException) and r.status_code == 503
+    )
+    report(name, elapsed, lags, rejected)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=64)
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    password_hash = auth.get_password_hash(password)
+    hasher = auth.PasswordHasher(
+        workers=args.workers, max_queue=args.max_queue, retry_after=1
+    )
+
+    async def inline():
+        return auth.verify_password(password, password_hash)
+
+    async def pooled():
+        return await hasher.verify(password, password_hash)
+
+    await storm("inline", args.logins, inline)
+    await storm("pooled", args.logins, pooled)
+    hasher.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Dense vs lexical vs hybrid (RRF) retrieval: recall@k and latency.
+
+Ingests a PDF into a throwaway Chroma directory and BM25 index, then asks
+`--queries` exact-phrase questions: runs of `--query-words` consecutive
+words taken from random chunks, the kind of formula names and course codes
+MiniLM tends to miss. A query counts as recalled when a chunk containing
+the phrase is among the top k. Latency includes embedding the query.
+
+    python test/bench_retrieval.py path/to/textbook.pdf --queries 300 --k 5
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+from app.core.settings import Settings
+from app.services import llm_client
+from app.services.embeddings import embedding_registry
+from app.services.lexical_index import BM25Index, LexicalIndexStore, tokenize
+from app.services.pdf_pages import content_hash, count_pages, extract_page_chunks
+from app.services.vector_store import VectorStore
+
+COLLECTION = "bench_retrieval"
+
+
+def ingest(pdf: str) -> list[tuple[str, str]]:
+    chunks: dict[str, str] = {}
+    for start in range(0, count_pages(pdf), Settings.ingestion_page_window):
+        for _, _, page_chunks in extract_page_chunks(
+            pdf, start, start + Settings.ingestion_page_window,
+            Settings.ingestion_chunk_size, Settings.ingestion_chunk_overlap,
+        ):
+            for text in page_chunks:
+                chunks[llm_client.chunk_id("bench", content_hash(text))] = text
+
+    items = list(chunks.items())
+    collection = llm_client.vector_store.get_or_create_collection(COLLECTION)
+    index = BM25Index()
+    for start in range(0, len(items), 256):
+        batch = items[start:start + 256]
+        texts = [text for _, text in batch]
+        collection.add(
+            ids=[cid for cid, _ in batch],
+            documents=texts,
+            embeddings=embedding_registry.embed(texts),
+        )
+        index.add([cid for cid, _ in batch], texts)
+    llm_client.lexical_store.save(COLLECTION, index)
+    return items
+
+
+def make_queries(items, count: int, words: int, rng: random.Random):
+    normalized = [(cid, " ".join(tokenize(text))) for cid, text in items]
+    queries = []
+    while len(queries) < count:
+        _, text = rng.choice(normalized)
+        tokens = text.split()
+        if len(tokens) < words:
+            continue
+        start = rng.randrange(len(tokens) - words + 1)
+        phrase = " ".join(tokens[start:start + words])
+        relevant = {cid for cid, other in normalized if phrase in other}
+        queries.append((phrase, relevant))
+    return queries
+
+
+def run(mode: str, queries, k: int, documents: dict[str, str]) -> None:
+    by_text = {text: cid for cid, text in documents.items()}
+    hits = 0
+    latencies = []
+    for phrase, relevant in queries:
+        started = time.perf_counter()
+        embedding = None
+        if mode != llm_client.LEXICAL:
+            embedding = embedding_registry.embed([phrase])[0]
+        found = llm_client.retrieve(phrase, embedding, COLLECTION, mode, top_k=k)
+        latencies.append(time.perf_counter() - started)
+        if any(by_text.get(text) in relevant for text in found):
+            hits += 1
+
+    ms = sorted(s * 1000 for s in latencies)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(
+        f"{mode:<8} recall@{k}={hits / len(queries):.3f}  "
+        f"p50={statistics.median(ms):7.2f}ms p95={p95:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdf")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--query-words", type=int, default=4)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # point retrieval at throwaway stores
+        llm_client.vector_store = VectorStore(path=str(Path(tmp) / "vectors"))
+        llm_client.lexical_store = LexicalIndexStore(Path(tmp) / "lexical")
+
+        items = ingest(args.pdf)
+        print(f"{len(items)} chunks")
+        queries = make_queries(
+            items, args.queries, args.query_words, random.Random(args.seed)
+        )
+        documents = dict(items)
+        for mode in llm_client.RETRIEVAL_MODES:
+            run(mode, queries, args.k, documents)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-call client vs cached-handle retrieval latency.
+
+Seeds a throwaway Chroma collection with random MiniLM-sized vectors and
+times `query` through a PersistentClient constructed for every call, as
+query_vector_db used to do, against the pooled VectorStore. Chroma shares
+one system per path between clients, so the per-call figure is client
+construction plus the collection lookup, not reopening the database.
+
+    python test/bench_vector_db.py --chunks 5000 --queries 200
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from chromadb import PersistentClient
+from chromadb.api.shared_system_client import SharedSystemClient
+
+from app.services.vector_store import VectorStore
+
+DIM = 384
+COLLECTION = "bench_course"
+
+
+def seed(path: str, chunks: int, batch: int = 1000) -> None:
+    client = PersistentClient(path=path)
+    collection = client.get_or_create_collection(name=COLLECTION)
+    rng = np.random.default_rng(0)
+    for start in range(0, chunks, batch):
+        stop = min(start + batch, chunks)
+        collection.add(
+            ids=[f"chunk_{i}" for i in range(start, stop)],
+            documents=[f"chunk text {i}" for i in range(start, stop)],
+            embeddings=rng.random((stop - start, DIM), dtype=np.float32),
+        )
+
+
+def report(name: str, samples: list[float]) -> None:
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(
+        f"{name:<16} mean={statistics.mean(ms):8.2f}ms "
+        f"p50={statistics.median(ms):8.2f}ms p95={p95:8.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        print(f"Seeding {args.chunks} chunks ...")
+        seed(path, args.chunks)
+        queries = np.random.default_rng(1).random((args.queries, DIM), dtype=np.float32)
+
+        per_call = []
+        for q in queries:
+            started = time.perf_counter()
+            client = PersistentClient(path=path)
+            collection = client.get_collection(name=COLLECTION)
+            collection.query(query_embeddings=[q], n_results=args.top_k)
+            per_call.append(time.perf_counter() - started)
+
+        store = VectorStore(path=path)
+        store.get_collection(COLLECTION)
+        cached = []
+        for q in queries:
+            started = time.perf_counter()
+            store.query(COLLECTION, query_embeddings=[q], n_results=args.top_k)
+            cached.append(time.perf_counter() - started)
+
+        report("per-call client", per_call)
+        report("cached handle", cached)
+        SharedSystemClient.clear_system_cache()
+
+
+if __name__ == '__main__':
+    main()
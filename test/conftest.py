@@ -0,0 +1,52 @@
+"""
+API tests run against a real Postgres, configured through the same
+POSTGRES_* variables as the application. The database defaults to
+`diplom_test` and is dropped and re-created for every test, so never point
+it at one whose data you need.
+
+    createdb diplom_test
+    python -m pytest test
+"""
+import os
+
+os.environ.setdefault("POSTGRES_DB", "diplom_test")
+
+import httpx
+import pytest
+
+from app.db import session as db
+from app.main import application
+from app.services.quiz_cache import quiz_content_cache
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def database():
+    try:
+        await db.init_models()
+    except OSError as exc:
+        pytest.skip(f"Postgres is not reachable: {exc}")
+    quiz_content_cache.clear()
+    yield
+    # pooled connections belong to this test's event loop
+    await db.engine.dispose()
+
+
+@pytest.fixture
+async def session(database):
+    # tests commit so the app's own sessions see their rows, then keep
+    # reading attributes, which an expiring session would reload lazily
+    async with db.async_session(expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+async def client(database):
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    application.dependency_overrides.clear()
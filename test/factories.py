@@ -0,0 +1,71 @@
+"""
+Rows and authentication for API tests.
+"""
+from app.core.auth import get_current_user
+from app.core.user_cache import UserSnapshot
+from app.main import application
+from app.models.answer_option import AnswerOption
+from app.models.course import Course
+from app.models.course_member import CourseMember
+from app.models.question import Question
+from app.models.quiz import Quiz
+from app.models.user import User
+
+
+def login_as(user: User) -> None:
+    """
+    Authenticate the next requests as `user` without a token.
+    """
+    snapshot = UserSnapshot.from_user(user)
+    application.dependency_overrides[get_current_user] = lambda: snapshot
+
+
+async def create_user(session, name: str) -> User:
+    user = User(username=name, email=f"{name}@example.com", password_hash="-")
+    session.add(user)
+    await session.flush()
+    return user
+
+
+async def create_course(session, owner: User, members: list[User] = ()) -> Course:
+    course = Course(title="Course", description="About things", id_user=owner.id_user)
+    session.add(course)
+    await session.flush()
+    session.add_all(
+        CourseMember(id_course=course.id_course, id_user=member.id_user)
+        for member in members
+    )
+    await session.flush()
+    return course
+
+
+async def create_quiz(
+    session, course: Course, questions: int, options: int = 4
+) -> tuple[Quiz, list[Question], list[list[AnswerOption]]]:
+    """
+    A quiz whose questions each have `options` answers, the first correct.
+    """
+    quiz = Quiz(
+        id_course=course.id_course, title="Quiz", description="Check yourself",
+        coins=10, min_correct_ratio=0.5,
+    )
+    session.add(quiz)
+    await session.flush()
+
+    question_rows = [
+        Question(id_quiz=quiz.id_quiz, title=f"Q{i}", text=f"Question {i}?")
+        for i in range(questions)
+    ]
+    session.add_all(question_rows)
+    await session.flush()
+
+    option_rows = [
+        [
+            AnswerOption(id_question=q.id_question, text=f"A{j}", is_correct=j == 0)
+            for j in range(options)
+        ]
+        for q in question_rows
+    ]
+    session.add_all(o for row in option_rows for o in row)
+    await session.flush()
+    return quiz, question_rows, option_rows
@@ -0,0 +1,257 @@
+"""
+OpenAI-compatible chat completions server for offline performance tests.
+
+Implements POST /v1/chat/completions, plain and streaming (SSE, with the
+usage chunk when `stream_options.include_usage` is set), and GET /v1/models.
+Completions start after a delay drawn from --distribution around --median
+and then produce --tps tokens per second. Failures can be injected:
+
+  --error-rate       share of requests answered with one of --error-statuses
+  --abort-rate       share of streams cut off halfway through
+  --max-concurrency  requests beyond this many in flight get 429, like a
+                     provider's rate limit
+
+GET /stats reports requests, in-flight and injected failures. With --seed
+the sequence of delays and failures is reproducible for a given order of
+requests.
+
+    python test/loadtest/llm_stub.py --port 8100 --median 0.8 --tps 50 --error-rate 0.01
+    LLM_BASE_URL=http://127.0.0.1:8100/v1 LLM_MAX_RETRIES=0 uvicorn app.main:application
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from stubs import LatencyModel, completion_words, prompt_tokens
+
+ERROR_TYPES = {
+    429: "rate_limit_exceeded",
+    500: "server_error",
+    502: "server_error",
+    503: "service_unavailable",
+}
+
+
+class _SlotResponse(StreamingResponse):
+    """
+    Streaming response that calls `release` once it is done, also when the
+    client goes away before the body starts and the generator never runs.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+class StubLLMServer:
+    def __init__(
+        self,
+        latency: LatencyModel,
+        tokens_per_second: float = 50.0,
+        completion_tokens: int = 60,
+        error_rate: float = 0.0,
+        error_statuses: tuple[int, ...] = (500, 503, 429),
+        abort_rate: float = 0.0,
+        max_concurrency: int = 0,
+        rng: random.Random | None = None,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.abort_rate = abort_rate
+        self.max_concurrency = max_concurrency
+        self.rng = rng or random.Random()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.errors = 0
+        self.rejected = 0
+        self.aborted = 0
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "injected_errors": self.errors,
+            "rate_limited": self.rejected,
+            "aborted_streams": self.aborted,
+        }
+
+    @staticmethod
+    def error(status: int, message: str) -> JSONResponse:
+        return JSONResponse(
+            status_code=status,
+            content={"error": {
+                "message": message,
+                "type": ERROR_TYPES.get(status, "server_error"),
+                "code": None,
+            }},
+            headers={"retry-after": "1"} if status == 429 else None,
+        )
+
+    async def chat_completions(self, request: Request):
+        body = await request.json()
+        self.requests += 1
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            self.rejected += 1
+            return self.error(429, "Too many concurrent requests")
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            status = self.rng.choice(self.error_statuses)
+            return self.error(status, "Injected failure")
+
+        model = body.get("model", "stub")
+        words = completion_words(
+            min(self.completion_tokens, body.get("max_tokens") or self.completion_tokens)
+        )
+        prompt = prompt_tokens(body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt,
+            "completion_tokens": len(words),
+            "total_tokens": prompt + len(words),
+        }
+        delay = self.latency.sample()
+        abort = bool(self.abort_rate) and self.rng.random() < self.abort_rate
+
+        # no await since the check above, so no other request can slip in
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return _SlotResponse(
+                self._stream(model, words, usage if include_usage else None, delay, abort),
+                release=self._release,
+                media_type="text/event-stream",
+            )
+
+        try:
+            await asyncio.sleep(delay)
+            if self.tokens_per_second:
+                await asyncio.sleep(len(words) / self.tokens_per_second)
+        finally:
+            self._release()
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": " ".join(words)},
+            }],
+            "usage": usage,
+        }
+
+    async def _stream(self, model, words, usage, delay: float, abort: bool):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def event(choices, usage=None) -> str:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+            }
+            if usage is not None:
+                chunk["usage"] = usage
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        await asyncio.sleep(delay)
+        yield event([{"index": 0, "delta": {"role": "assistant", "content": ""}}])
+        for i, word in enumerate(words):
+            if abort and i == len(words) // 2:
+                self.aborted += 1
+                raise ConnectionAbortedError("Injected stream abort")
+            if i and self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            text = word if i == 0 else " " + word
+            yield event([{"index": 0, "delta": {"content": text}}])
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if usage is not None:
+            yield event([], usage)
+        yield "data: [DONE]\n\n"
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+
+
+def create_app(server: StubLLMServer) -> FastAPI:
+    app = FastAPI()
+    app.add_api_route("/v1/chat/completions", server.chat_completions, methods=["POST"])
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [
+            {"id": "stub", "object": "model", "created": 0, "owned_by": "loadtest"}
+        ]}
+
+    @app.get("/stats")
+    async def stats():
+        return server.stats()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--distribution", default="lognormal",
+                        choices=LatencyModel.DISTRIBUTIONS)
+    parser.add_argument("--median", type=float, default=0.8,
+                        help="median seconds to the first token")
+    parser.add_argument("--spread", type=float, default=0.5,
+                        help="see stubs.LatencyModel")
+    parser.add_argument("--tps", type=float, default=50.0,
+                        help="generated tokens per second")
+    parser.add_argument("--tokens", type=int, default=60,
+                        help="tokens per completion, capped by max_tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-statuses", default="500,503,429",
+                        help="comma-separated statuses for injected errors")
+    parser.add_argument("--abort-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="0 for no limit")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    server = StubLLMServer(
+        latency=LatencyModel(args.distribution, args.median, args.spread, rng=rng),
+        tokens_per_second=args.tps,
+        completion_tokens=args.tokens,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_statuses.split(",")),
+        abort_rate=args.abort_rate,
+        max_concurrency=args.max_concurrency,
+        rng=rng,
+    )
+    uvicorn.run(create_app(server), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Drive a running API with concurrent virtual users and report throughput
+and latency percentiles per operation.
+
+Each virtual user logs in as an account from the seed manifest, keeps a
+quiz result stream open if chosen for SSE, and then loops over a weighted
+mix of: the for-you course list, a course's for-you dashboard, opening a
+quiz, submitting it, and reading the results of a taken one. Submissions
+also measure how long the feedback takes to arrive over SSE.
+
+    python test/loadtest/serve.py &
+    python test/loadtest/run.py --users 200 --duration 60 --out results.json
+
+Results go to --out as JSON, with the commit under test, so runs can be
+compared across commits.
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime
+
+import httpx
+
+# operation -> weight in the mix
+MIX = {
+    "for_you": 3,
+    "course_for_you": 3,
+    "do_quiz": 2,
+    "submit": 1,
+    "results": 2,
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.statuses: dict[str, dict[int, int]] = {}
+
+    def record(self, op: str, seconds: float, status: int | None) -> None:
+        ok = status is not None and status < 400
+        if ok:
+            self.latencies.setdefault(op, []).append(seconds)
+        else:
+            self.errors[op] = self.errors.get(op, 0) + 1
+        by_status = self.statuses.setdefault(op, {})
+        by_status[status or 0] = by_status.get(status or 0, 0) + 1
+
+    async def timed(self, op: str, request):
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.record(op, time.perf_counter() - started, None)
+            return None
+        self.record(op, time.perf_counter() - started, response.status_code)
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        ops = {}
+        for op in sorted(set(self.latencies) | set(self.errors)):
+            ms = sorted(s * 1000 for s in self.latencies.get(op, []))
+            ops[op] = {
+                "count": len(ms),
+                "errors": self.errors.get(op, 0),
+                "statuses": self.statuses.get(op, {}),
+                "throughput": len(ms) / elapsed,
+                "mean_ms": sum(ms) / len(ms) if ms else None,
+                "p50_ms": percentile(ms, 50),
+                "p95_ms": percentile(ms, 95),
+                "p99_ms": percentile(ms, 99),
+                "max_ms": ms[-1] if ms else None,
+            }
+        return ops
+
+
+def percentile(sorted_values: list[float], p: float) -> float | None:
+    """
+    Nearest-rank percentile.
+    """
+    if not sorted_values:
+        return None
+    rank = max(int(len(sorted_values) * p / 100 + 0.999999) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, account: dict, password: str,
+                 recorder: Recorder, rng: random.Random):
+        self.client = client
+        self.account = account
+        self.password = password
+        self.recorder = recorder
+        self.rng = rng
+        self.open_quizzes = list(account["open_quizzes"])
+        self.taken_quizzes = list(account["taken_quizzes"])
+        self.headers: dict[str, str] = {}
+        self.listening = False
+        # quiz id -> when it was submitted, until its result arrives
+        self.awaiting: dict[int, float] = {}
+
+    async def login(self) -> bool:
+        response = await self.recorder.timed("login", self.client.post(
+            "/user/token",
+            data={"username": self.account["username"], "password": self.password},
+        ))
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def listen(self, connected: asyncio.Event) -> None:
+        """
+        Hold a result stream open and time submit -> result event.
+        """
+        started = time.perf_counter()
+        try:
+            async with self.client.stream(
+                "GET", "/sse/quiz_results", headers=self.headers,
+                timeout=httpx.Timeout(None, connect=10),
+            ) as response:
+                self.recorder.record(
+                    "sse_connect", time.perf_counter() - started, response.status_code
+                )
+                connected.set()
+                if response.status_code != 200:
+                    return
+                self.listening = True
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    quiz_id = json.loads(line[len("data:"):]).get("quiz_id")
+                    submitted = self.awaiting.pop(quiz_id, None)
+                    if submitted is not None:
+                        self.recorder.record(
+                            "sse_feedback", time.perf_counter() - submitted, 200
+                        )
+        except httpx.HTTPError:
+            self.recorder.record("sse_connect", time.perf_counter() - started, None)
+        finally:
+            connected.set()
+
+    async def step(self) -> None:
+        op = self.rng.choices(list(MIX), weights=list(MIX.values()))[0]
+        if op == "for_you":
+            await self.recorder.timed(op, self.client.get(
+                "/course/for_you", headers=self.headers
+            ))
+        elif op == "course_for_you":
+            course = self.rng.choice(self.account["courses"])
+            await self.recorder.timed(op, self.client.get(
+                f"/course/{course}/for_you", headers=self.headers
+            ))
+        elif op == "do_quiz" and self.open_quizzes:
+            quiz = self.rng.choice(self.open_quizzes)
+            await self.recorder.timed(op, self.client.get(
+                f"/quiz/for_you/{quiz}/do", headers=self.headers
+            ))
+        elif op == "submit" and self.open_quizzes:
+            await self.submit(self.open_quizzes.pop())
+        elif op == "results" and self.taken_quizzes:
+            quiz = self.rng.choice(self.taken_quizzes)
+            await self.recorder.timed(op, self.client.get(
+                f"/quiz/for_you/{quiz}/results", headers=self.headers
+            ))
+
+    async def submit(self, quiz: int) -> None:
+        response = await self.recorder.timed("do_quiz", self.client.get(
+            f"/quiz/for_you/{quiz}/do", headers=self.headers
+        ))
+        if response is None or response.status_code != 200:
+            return
+        answers = [
+            {"id_question": q["id_question"],
+             "id_answer": self.rng.choice(q["answers"])["id_answer"]}
+            for q in response.json()["questions"]
+        ]
+        if self.listening:
+            self.awaiting[quiz] = time.perf_counter()
+        response = await self.recorder.timed("submit", self.client.post(
+            f"/quiz/for_you/{quiz}/submit", json={"answers": answers},
+            headers=self.headers,
+        ))
+        if response is not None and response.status_code == 200:
+            self.taken_quizzes.append(quiz)
+        else:
+            self.awaiting.pop(quiz, None)
+
+
+async def virtual_user(vu: VirtualUser, sse: bool, ramp: float, deadline: float,
+                       think: float) -> None:
+    await asyncio.sleep(ramp)
+    if not await vu.login():
+        return
+    listener = None
+    if sse:
+        connected = asyncio.Event()
+        listener = asyncio.create_task(vu.listen(connected))
+        await connected.wait()
+    try:
+        while time.perf_counter() < deadline:
+            await vu.step()
+            if think:
+                await asyncio.sleep(vu.rng.expovariate(1 / think))
+    finally:
+        if listener is not None:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(ops: dict) -> None:
+    print(f"{'operation':<16}{'count':>8}{'errors':>8}{'req/s':>9}"
+          f"{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+    for op, s in ops.items():
+        cells = [f"{s[k]:9.1f}" if s[k] is not None else f"{'-':>9}"
+                 for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{op:<16}{s['count']:>8}{s['errors']:>8}{s['throughput']:>9.1f}"
+              + "".join(cells))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    parser.add_argument("--users", type=int, default=100, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of load")
+    parser.add_argument("--ramp-up", type=float, default=5.0,
+                        help="seconds over which virtual users start")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="mean pause between a user's requests, seconds")
+    parser.add_argument("--sse-fraction", type=float, default=0.5,
+                        help="share of virtual users holding a result stream")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="loadtest_results.json")
+    args = parser.parse_args()
+
+    with open(args.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    accounts = manifest["accounts"]
+    if args.users > len(accounts):
+        sys.exit(f"Manifest has {len(accounts)} accounts, --users asks for {args.users}")
+
+    rng = random.Random(args.seed)
+    rng.shuffle(accounts)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=httpx.Timeout(60, connect=10)
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.ramp_up + args.duration
+        users = [
+            VirtualUser(client, account, manifest["password"], recorder,
+                        random.Random(rng.random()))
+            for account in accounts[:args.users]
+        ]
+        await asyncio.gather(*(
+            virtual_user(
+                vu,
+                sse=i < args.users * args.sse_fraction,
+                ramp=args.ramp_up * i / args.users,
+                deadline=deadline,
+                think=args.think,
+            )
+            for i, vu in enumerate(users)
+        ))
+        elapsed = time.perf_counter() - started
+
+    ops = recorder.summary(elapsed)
+    # feedback deliveries are not requests
+    total = sum(s["count"] for op, s in ops.items() if op != "sse_feedback")
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "finished_at": datetime.utcnow().isoformat() + "Z",
+            "args": vars(args),
+        },
+        "elapsed_seconds": elapsed,
+        "throughput": total / elapsed,
+        "operations": ops,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    print_table(ops)
+    print(f"{total / elapsed:.1f} req/s over {elapsed:.1f}s, written to {args.out}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
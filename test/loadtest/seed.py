@@ -0,0 +1,301 @@
+"""
+Seed a database with a reproducible, realistically sized dataset for the
+load test, and write a manifest of accounts the driver can log in with.
+
+Default scale: 10k users, 1k courses, 50k quizzes (5 questions of 4
+options each) and 5M attempt answers, i.e. 1M attempts. Every user is a
+member of `--memberships` courses and has attempted only part of their
+quizzes, so there is something left to submit. Rows go in with COPY;
+`--scale 0.01` gives a dataset small enough for a laptop.
+
+    python test/loadtest/seed.py --reset --manifest loadtest_manifest.json
+
+Connects with the POSTGRES_* settings the API uses. Refuses to touch a
+database that already has users unless --reset is given, which TRUNCATEs
+every application table.
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import asyncpg
+
+from app.core.auth import get_password_hash
+from app.core.settings import settings
+
+PASSWORD = "loadtest-password"
+BATCH = 20_000
+
+# (table, pk) in insertion order
+TABLES = [
+    ("user", "id_user"),
+    ("course", "id_course"),
+    ("course_member", "id_course_member"),
+    ("quiz", "id_quiz"),
+    ("question", "id_question"),
+    ("answer_option", "id_answer_option"),
+    ("quiz_attempt", "id_quiz_attempt"),
+    ("quiz_attempt_answer", "id_quiz_attempt_answer"),
+]
+
+
+class Dataset:
+    """
+    Ids are dense and 1-based, and most relations are arithmetic on them,
+    so nothing but memberships and taken (user, quiz) pairs is kept in
+    memory. Quiz q belongs to course (q - 1) % courses + 1; question k has
+    options (k - 1) * options + 1 .. k * options.
+    """
+
+    def __init__(self, args, rng: random.Random):
+        self.rng = rng
+        self.users = max(1, int(args.users * args.scale))
+        self.courses = max(1, int(args.courses * args.scale))
+        self.quizzes = max(self.courses, int(args.quizzes * args.scale))
+        self.questions = args.questions
+        self.options = args.options
+        self.memberships = min(args.memberships, self.courses)
+
+        self.member_courses = {
+            u: rng.sample(range(1, self.courses + 1), self.memberships)
+            for u in range(1, self.users + 1)
+        }
+        reachable = sum(
+            self.quizzes_in_course(c)
+            for courses in self.member_courses.values() for c in courses
+        )
+        wanted = int(args.answers * args.scale) // self.questions
+        # leave every user something to take
+        self.attempts = min(wanted, int(reachable * 0.8))
+
+    def quizzes_in_course(self, course: int) -> int:
+        return (self.quizzes - course) // self.courses + 1
+
+    def quizzes_of_course(self, course: int) -> range:
+        return range(course, self.quizzes + 1, self.courses)
+
+    def course_of_quiz(self, quiz: int) -> int:
+        return (quiz - 1) % self.courses + 1
+
+    def correct_option(self, question: int) -> int:
+        return (question - 1) * self.options + (question * 7919) % self.options + 1
+
+    def min_correct_ratio(self, quiz: int) -> float:
+        return 0.5 + (quiz % 4) * 0.1
+
+    # ─── Rows ────────────────────────────────────────────────────────────────
+
+    def users_rows(self, password_hash: str):
+        for u in range(1, self.users + 1):
+            yield (u, f"First{u}", f"Second{u}", f"lt{u}@example.com",
+                   f"lt_user_{u}", password_hash)
+
+    def course_rows(self):
+        for c in range(1, self.courses + 1):
+            yield (c, f"Course {c}", f"Load test course {c}",
+                   self.rng.randrange(1, self.users + 1))
+
+    def member_rows(self):
+        id_member = 0
+        for u, courses in self.member_courses.items():
+            for c in courses:
+                id_member += 1
+                yield (id_member, c, u)
+
+    def quiz_rows(self):
+        for q in range(1, self.quizzes + 1):
+            yield (q, self.course_of_quiz(q), f"Quiz {q}", f"Load test quiz {q}",
+                   10 + (q % 5) * 10, self.min_correct_ratio(q))
+
+    def question_rows(self):
+        for q in range(1, self.quizzes + 1):
+            for k in range((q - 1) * self.questions + 1, q * self.questions + 1):
+                yield (k, q, f"Question {k}", f"What is the answer to question {k}?",
+                       None)
+
+    def option_rows(self):
+        for k in range(1, self.quizzes * self.questions + 1):
+            correct = self.correct_option(k)
+            for o in range((k - 1) * self.options + 1, k * self.options + 1):
+                yield (o, k, f"Option {o}", o == correct)
+
+    def attempt_batches(self, sample: set[int], taken_by: dict[int, list[int]]):
+        """
+        Batches of (attempt rows, answer rows). Records the quizzes taken by
+        users in `sample` into `taken_by`.
+        """
+        taken: set[int] = set()
+        id_attempt = 0
+        id_answer = 0
+        now = datetime.utcnow()
+        attempts, answers = [], []
+        while id_attempt < self.attempts:
+            u = self.rng.randrange(1, self.users + 1)
+            course = self.rng.choice(self.member_courses[u])
+            q = course + self.courses * self.rng.randrange(self.quizzes_in_course(course))
+            key = u * (self.quizzes + 1) + q
+            if key in taken:
+                continue
+            taken.add(key)
+            id_attempt += 1
+            if u in sample:
+                taken_by[u].append(q)
+
+            correct = 0
+            for k in range((q - 1) * self.questions + 1, q * self.questions + 1):
+                right = self.correct_option(k)
+                if self.rng.random() < 0.7:
+                    chosen = right
+                else:
+                    chosen = (k - 1) * self.options + self.rng.randrange(self.options) + 1
+                correct += chosen == right
+                id_answer += 1
+                answers.append((id_answer, id_attempt, k, chosen))
+
+            ratio = correct / self.questions
+            attempts.append((
+                id_attempt, q, u,
+                now - timedelta(seconds=self.rng.randrange(90 * 24 * 3600)),
+                "Seeded feedback.", correct, self.questions, ratio,
+                ratio >= self.min_correct_ratio(q),
+            ))
+            if len(attempts) >= BATCH:
+                yield attempts, answers
+                attempts, answers = [], []
+        if attempts:
+            yield attempts, answers
+
+
+async def copy(conn, table: str, columns: list[str], rows) -> int:
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH * 5:
+            await conn.copy_records_to_table(table, records=batch, columns=columns)
+            total += len(batch)
+            batch = []
+    if batch:
+        await conn.copy_records_to_table(table, records=batch, columns=columns)
+        total += len(batch)
+    print(f"  {table}: {total} rows")
+    return total
+
+
+async def seed(args) -> None:
+    rng = random.Random(args.seed)
+    conn = await asyncpg.connect(settings.get_dsn())
+    try:
+        existing = await conn.fetchval('SELECT count(*) FROM "user"')
+        if existing and not args.reset:
+            sys.exit(f"{existing} users already present; pass --reset to wipe them")
+        if args.reset:
+            await conn.execute(
+                "TRUNCATE " + ", ".join(f'"{t}"' for t, _ in TABLES)
+                + ", handle_quiz_attempt, feedback_job, file_chunk, file"
+                + " RESTART IDENTITY CASCADE"
+            )
+
+        started = time.perf_counter()
+        data = Dataset(args, rng)
+        print(
+            f"{data.users} users, {data.courses} courses, {data.quizzes} quizzes, "
+            f"{data.attempts} attempts ({data.attempts * data.questions} answers)"
+        )
+
+        await copy(conn, "user", [
+            "id_user", "first_name", "second_name", "email", "username", "password_hash",
+        ], data.users_rows(get_password_hash(args.password)))
+        await copy(conn, "course", [
+            "id_course", "title", "description", "id_user",
+        ], data.course_rows())
+        await copy(conn, "course_member", [
+            "id_course_member", "id_course", "id_user",
+        ], data.member_rows())
+        await copy(conn, "quiz", [
+            "id_quiz", "id_course", "title", "description", "coins", "min_correct_ratio",
+        ], data.quiz_rows())
+        await copy(conn, "question", [
+            "id_question", "id_quiz", "title", "text", "study_materials",
+        ], data.question_rows())
+        await copy(conn, "answer_option", [
+            "id_answer_option", "id_question", "text", "is_correct",
+        ], data.option_rows())
+
+        sample = set(rng.sample(range(1, data.users + 1), min(args.manifest_users, data.users)))
+        taken_by: dict[int, list[int]] = {u: [] for u in sample}
+        attempts = answers = 0
+        for attempt_rows, answer_rows in data.attempt_batches(sample, taken_by):
+            await conn.copy_records_to_table("quiz_attempt", records=attempt_rows, columns=[
+                "id_quiz_attempt", "id_quiz", "id_user", "attempt_date", "feedback",
+                "correct_count", "total_count", "correct_ratio", "passed",
+            ])
+            await conn.copy_records_to_table("quiz_attempt_answer", records=answer_rows, columns=[
+                "id_quiz_attempt_answer", "id_quiz_attempt", "id_question", "id_answer_option",
+            ])
+            attempts += len(attempt_rows)
+            answers += len(answer_rows)
+            print(f"  quiz_attempt: {attempts} rows, quiz_attempt_answer: {answers} rows", end="\r")
+        print()
+
+        # explicit ids leave the sequences behind
+        for table, pk in TABLES:
+            await conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', '{pk}'), "
+                f"COALESCE((SELECT max({pk}) FROM \"{table}\"), 0) + 1, false)"
+            )
+        await conn.execute("ANALYZE")
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+    accounts = []
+    for u in sorted(sample):
+        taken = set(taken_by[u])
+        open_quizzes = [
+            q for c in data.member_courses[u] for q in data.quizzes_of_course(c)
+            if q not in taken
+        ]
+        rng.shuffle(open_quizzes)
+        accounts.append({
+            "username": f"lt_user_{u}",
+            "courses": data.member_courses[u],
+            "open_quizzes": open_quizzes[:args.manifest_quizzes],
+            "taken_quizzes": taken_by[u][:args.manifest_quizzes],
+        })
+    with open(args.manifest, "w", encoding="utf-8") as f:
+        json.dump({"password": args.password, "seed": args.seed, "accounts": accounts}, f)
+    print(f"Manifest with {len(accounts)} accounts written to {args.manifest}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--courses", type=int, default=1_000)
+    parser.add_argument("--quizzes", type=int, default=50_000)
+    parser.add_argument("--answers", type=int, default=5_000_000)
+    parser.add_argument("--questions", type=int, default=5, help="per quiz")
+    parser.add_argument("--options", type=int, default=4, help="per question")
+    parser.add_argument("--memberships", type=int, default=8, help="courses per user")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiplies users, courses, quizzes and answers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--password", default=PASSWORD)
+    parser.add_argument("--reset", action="store_true")
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    parser.add_argument("--manifest-users", type=int, default=2_000)
+    parser.add_argument("--manifest-quizzes", type=int, default=50,
+                        help="open and taken quizzes listed per account")
+    args = parser.parse_args()
+    asyncio.run(seed(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Run the API for a load test, with the embedding model and the LLM
+provider replaced by local stubs so nothing leaves the machine.
+
+    python test/loadtest/serve.py --port 8000 --llm-median 0.8 --llm-tps 50
+
+Pass --real-llm / --real-embeddings to keep either dependency. With
+--real-llm the API talks to LLM_BASE_URL, which can be the stub server in
+llm_stub.py to exercise the HTTP client as well:
+
+    python test/loadtest/llm_stub.py --port 8100 &
+    LLM_BASE_URL=http://127.0.0.1:8100/v1 python test/loadtest/serve.py --real-llm
+
+Runs a single worker process; start several on different ports to test more.
+"""
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import argparse
+import random
+
+import uvicorn
+
+from stubs import LatencyModel, install_stubs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--real-llm", action="store_true")
+    parser.add_argument("--real-embeddings", action="store_true")
+    parser.add_argument("--embedding-ms", type=float, default=0.0,
+                        help="simulated model time per embedded text")
+    parser.add_argument("--llm-distribution", default="lognormal",
+                        choices=LatencyModel.DISTRIBUTIONS)
+    parser.add_argument("--llm-median", type=float, default=0.8,
+                        help="median seconds to the first token")
+    parser.add_argument("--llm-spread", type=float, default=0.5,
+                        help="see stubs.LatencyModel")
+    parser.add_argument("--llm-tps", type=float, default=50.0,
+                        help="generated tokens per second")
+    parser.add_argument("--llm-tokens", type=int, default=60,
+                        help="tokens per completion")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    install_stubs(
+        embeddings=not args.real_embeddings,
+        llm=not args.real_llm,
+        embedding_seconds_per_text=args.embedding_ms / 1000,
+        latency=LatencyModel(
+            args.llm_distribution, args.llm_median, args.llm_spread,
+            rng=random.Random(args.seed),
+        ),
+        tokens_per_second=args.llm_tps,
+        completion_tokens=args.llm_tokens,
+        error_rate=args.llm_error_rate,
+        seed=args.seed,
+    )
+
+    from app.main import application
+    uvicorn.run(application, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
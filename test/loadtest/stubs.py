@@ -0,0 +1,231 @@
+"""
+Offline stand-ins for the embedding model and the LLM provider.
+
+Both plug in below the application's own clients (EmbeddingRegistry.install,
+AsyncLLMClient.install), so batching, the concurrency semaphore and the
+metrics still run as in production; only the model call is replaced.
+"""
+import asyncio
+import hashlib
+import math
+import random
+import time
+import uuid
+
+from openai.types import CompletionUsage
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionChunk,
+    ChatCompletionMessage,
+)
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+
+EMBEDDING_DIM = 384  # what MiniLM-L6-v2 produces
+
+FEEDBACK_WORDS = (
+    "Good work overall. Review the questions you missed and the related "
+    "material in the course files before trying a similar quiz again."
+).split()
+
+
+class HashEmbedding:
+    """
+    Deterministic unit vectors derived from the text's hash. Equal texts
+    get equal vectors; similarity means nothing otherwise.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, seconds_per_text: float = 0.0):
+        self.dim = dim
+        self.seconds_per_text = seconds_per_text
+
+    def __call__(self, texts):
+        if self.seconds_per_text:
+            time.sleep(self.seconds_per_text * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def _vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+        rng = random.Random(seed)
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.dim)]
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector]
+
+
+class _StubStream:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def __aiter__(self):
+        return self._chunks
+
+    async def close(self) -> None:
+        await self._chunks.aclose()
+
+
+class LatencyModel:
+    """
+    Seconds until a completion starts, drawn from one of DISTRIBUTIONS
+    around `median`. `spread` is the log-normal sigma, or the relative
+    half-width of the uniform range; fixed and exponential ignore it.
+    """
+
+    DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "exponential")
+
+    def __init__(
+        self,
+        distribution: str = "lognormal",
+        median: float = 0.8,
+        spread: float = 0.5,
+        rng: random.Random | None = None,
+    ):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}")
+        self.distribution = distribution
+        self.median = median
+        self.spread = spread
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        if self.distribution == "fixed":
+            return self.median
+        if self.distribution == "uniform":
+            return self.rng.uniform(
+                self.median * max(1 - self.spread, 0), self.median * (1 + self.spread)
+            )
+        if self.distribution == "exponential":
+            return self.rng.expovariate(math.log(2) / self.median)
+        return self.rng.lognormvariate(math.log(self.median), self.spread)
+
+
+def completion_words(count: int) -> list[str]:
+    return [FEEDBACK_WORDS[i % len(FEEDBACK_WORDS)] for i in range(count)]
+
+
+def prompt_tokens(messages) -> int:
+    # whitespace words are close enough to tokens for load tests
+    return sum(
+        len(m["content"].split()) for m in messages if isinstance(m.get("content"), str)
+    )
+
+
+class StubChatCompletions:
+    """
+    `chat.completions.create` answering after a LatencyModel delay, then at
+    `tokens_per_second`.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyModel | None = None,
+        tokens_per_second: float = 50.0,
+        completion_tokens: int = 60,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self._rng = random.Random(seed)
+        self.latency = latency or LatencyModel(rng=self._rng)
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+
+    def _words(self, max_tokens: int) -> list[str]:
+        return completion_words(min(self.completion_tokens, max_tokens))
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise RuntimeError("Injected LLM stub failure")
+
+    async def create(
+        self, model: str, messages, max_tokens: int = 512, stream: bool = False, **_
+    ):
+        prompt = prompt_tokens(messages)
+        words = self._words(max_tokens)
+        usage = CompletionUsage(
+            prompt_tokens=prompt,
+            completion_tokens=len(words),
+            total_tokens=prompt + len(words),
+        )
+        if stream:
+            return _StubStream(self._stream(model, words, usage))
+
+        await asyncio.sleep(self.latency.sample())
+        self._maybe_fail()
+        if self.tokens_per_second:
+            await asyncio.sleep(len(words) / self.tokens_per_second)
+        return ChatCompletion(
+            id=f"chatcmpl-{uuid.uuid4().hex}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=model,
+            choices=[Choice(
+                index=0,
+                finish_reason="stop",
+                message=ChatCompletionMessage(role="assistant", content=" ".join(words)),
+            )],
+            usage=usage,
+        )
+
+    async def _stream(self, model: str, words: list[str], usage: CompletionUsage):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def chunk(choices, usage=None) -> ChatCompletionChunk:
+            return ChatCompletionChunk(
+                id=completion_id,
+                object="chat.completion.chunk",
+                created=created,
+                model=model,
+                choices=choices,
+                usage=usage,
+            )
+
+        await asyncio.sleep(self.latency.sample())
+        self._maybe_fail()
+        for i, word in enumerate(words):
+            if i and self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            text = word if i == 0 else " " + word
+            yield chunk([ChunkChoice(index=0, delta=ChoiceDelta(content=text))])
+        yield chunk([ChunkChoice(index=0, delta=ChoiceDelta(), finish_reason="stop")])
+        yield chunk([], usage=usage)
+
+
+class _Chat:
+    def __init__(self, completions: StubChatCompletions):
+        self.completions = completions
+
+
+class StubOpenAI:
+    """
+    The slice of AsyncOpenAI that AsyncLLMClient uses.
+    """
+
+    def __init__(self, completions: StubChatCompletions):
+        self.chat = _Chat(completions)
+
+    async def close(self) -> None:
+        pass
+
+
+def install_stubs(
+    embeddings: bool = True,
+    llm: bool = True,
+    embedding_seconds_per_text: float = 0.0,
+    latency: LatencyModel | None = None,
+    **llm_options,
+) -> None:
+    """
+    Swap the process-wide embedding model and/or LLM client for stubs.
+    Call before the application starts.
+    """
+    from app.services.async_llm import chat_client
+    from app.services.embeddings import embedding_registry
+
+    if embeddings:
+        embedding_registry.install(HashEmbedding(seconds_per_text=embedding_seconds_per_text))
+    if llm:
+        chat_client.install(StubOpenAI(StubChatCompletions(latency, **llm_options)))
@@ -0,0 +1,83 @@
+import pytest
+
+from app.api import course as course_api
+from app.core.settings import Settings
+from app.models.file import File as CourseFile
+from factories import create_course, create_user, login_as
+
+pytestmark = pytest.mark.anyio
+
+PDF = b"%PDF-1.4\n%test\n"
+
+
+@pytest.fixture
+def submitted(monkeypatch, tmp_path):
+    """
+    Ids handed to the ingestion pipeline, which is not started in tests.
+    """
+    ids = []
+    monkeypatch.setattr(Settings, "uploads_path", tmp_path)
+    monkeypatch.setattr(course_api.ingestion_pipeline, "submit", ids.append)
+    return ids
+
+
+async def upload(client, id_course: int, content: bytes = PDF):
+    return await client.post(
+        f"/course/{id_course}/add_file",
+        files={"upload": ("notes.pdf", content, "application/pdf")},
+    )
+
+
+async def test_upload_is_submitted_for_ingestion(client, session, submitted):
+    owner = await create_user(session, "owner")
+    course = await create_course(session, owner)
+    await session.commit()
+    login_as(owner)
+
+    response = await upload(client, course.id_course)
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["msg"] == "ok"
+    assert body["status"] == "pending"
+    assert submitted == [body["id_file"]]
+    assert await session.get(CourseFile, body["id_file"]) is not None
+
+
+async def mark_done(session, id_file: int) -> None:
+    file_rec = await session.get(CourseFile, id_file)
+    file_rec.status = "done"
+    await session.commit()
+
+
+async def test_identical_reupload_is_unchanged(client, session, submitted):
+    owner = await create_user(session, "owner")
+    course = await create_course(session, owner)
+    await session.commit()
+    login_as(owner)
+    first = (await upload(client, course.id_course)).json()
+    await mark_done(session, first["id_file"])
+
+    response = await upload(client, course.id_course)
+
+    assert response.status_code == 202
+    assert response.json() == {
+        "msg": "unchanged", "id_file": first["id_file"], "status": "done",
+    }
+    assert submitted == [first["id_file"]]
+
+
+async def test_revised_reupload_is_reingested(client, session, submitted):
+    owner = await create_user(session, "owner")
+    course = await create_course(session, owner)
+    await session.commit()
+    login_as(owner)
+    first = (await upload(client, course.id_course)).json()
+    await mark_done(session, first["id_file"])
+
+    response = await upload(client, course.id_course, PDF + b"%revised\n")
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body == {"msg": "ok", "id_file": first["id_file"], "status": "pending"}
+    assert submitted == [first["id_file"], first["id_file"]]
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.query_stats import count_queries
+from app.models.quiz_attempt import QuizAttempt
+from factories import create_course, create_quiz, create_user, login_as
+
+pytestmark = pytest.mark.anyio
+
+QUIZZES = 25
+
+
+async def test_course_for_you_has_a_fixed_query_budget(client, session):
+    owner = await create_user(session, "owner")
+    student = await create_user(session, "student")
+    course = await create_course(session, owner, members=[student])
+    quizzes = [(await create_quiz(session, course, 3))[0] for _ in range(QUIZZES)]
+    # every other quiz taken twice; the later attempt is the one reported
+    started = datetime.utcnow() - timedelta(days=1)
+    for quiz in quizzes[::2]:
+        for minutes, ratio in ((0, 0.0), (5, 1.0)):
+            session.add(QuizAttempt(
+                id_quiz=quiz.id_quiz,
+                id_user=student.id_user,
+                attempt_date=started + timedelta(minutes=minutes),
+                correct_ratio=ratio,
+            ))
+    await session.commit()
+    login_as(student)
+
+    with count_queries() as queries:
+        response = await client.get(f"/course/{course.id_course}/for_you")
+
+    assert response.status_code == 200
+    listed = response.json()["quizes"]
+    assert len(listed) == QUIZZES
+    assert [q["is_complete"] for q in listed] == [i % 2 == 0 for i in range(QUIZZES)]
+    assert {q["correct_ratio"] for q in listed[::2]} == {1.0}
+    queries.assert_at_most(2)
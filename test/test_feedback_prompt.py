@@ -0,0 +1,36 @@
+import pytest
+
+from app.db.query_stats import count_queries
+from app.services.prompts import generate_feedback_prompt
+from factories import create_course, create_quiz, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+def wrong_answers(questions, options):
+    return [
+        {"id_question": q.id_question, "id_answer": row[1].id_answer_option}
+        for q, row in zip(questions, options)
+    ]
+
+
+async def test_feedback_prompt_queries_do_not_grow_with_the_quiz(session):
+    owner = await create_user(session, "owner")
+    course = await create_course(session, owner)
+    small, small_questions, small_options = await create_quiz(session, course, 2)
+    large, large_questions, large_options = await create_quiz(session, course, 30)
+    await session.commit()
+
+    with count_queries() as small_queries:
+        small_prompt = await generate_feedback_prompt(
+            small.id_quiz, wrong_answers(small_questions, small_options), session
+        )
+    with count_queries() as large_queries:
+        large_prompt = await generate_feedback_prompt(
+            large.id_quiz, wrong_answers(large_questions, large_options), session
+        )
+
+    assert small_prompt.count("Question: ") == 2
+    assert large_prompt.count("Question: ") == 30
+    assert large_queries.count == small_queries.count
+    large_queries.assert_at_most(2)
@@ -0,0 +1,33 @@
+from app.services.lexical_index import LexicalIndexStore
+
+
+def test_edits_from_two_processes_keep_each_others_chunks(tmp_path):
+    # two stores over one directory stand in for two API processes, each
+    # with the index cached from before the other one wrote
+    first, second = LexicalIndexStore(tmp_path), LexicalIndexStore(tmp_path)
+    first.get("course_1")
+    second.get("course_1")
+
+    with first.edit("course_1") as index:
+        index.add(["file1_a"], ["photosynthesis in plants"])
+    with second.edit("course_1") as index:
+        index.add(["file2_a"], ["mitochondria and respiration"])
+
+    index = LexicalIndexStore(tmp_path).get("course_1")
+    assert "file1_a" in index and "file2_a" in index
+    assert [doc for doc, _ in first.get("course_1").search("photosynthesis", 5)] == ["file1_a"]
+
+
+def test_failed_edit_saves_nothing(tmp_path):
+    store = LexicalIndexStore(tmp_path)
+    with store.edit("course_1") as index:
+        index.add(["file1_a"], ["photosynthesis"])
+
+    try:
+        with store.edit("course_1") as index:
+            index.remove(["file1_a"])
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    assert "file1_a" in LexicalIndexStore(tmp_path).get("course_1")
@@ -0,0 +1,125 @@
+import pytest
+
+from app.db import session as db
+from app.db.query_stats import count_queries
+from app.services.quiz_cache import (
+    LocalQuizCacheBackend,
+    OptionContent,
+    QuestionContent,
+    QuizContent,
+    quiz_content_cache,
+)
+from factories import create_course, create_quiz, create_user
+
+
+def quiz(id_quiz: int, questions: int) -> QuizContent:
+    return QuizContent(
+        id_quiz=id_quiz, id_course=1, title="Quiz", description=None,
+        coins=10, min_correct_ratio=0.5,
+        questions=tuple(
+            QuestionContent(
+                id_question=id_quiz * 100 + i, title="Q", text="?",
+                study_materials=None,
+                options=(OptionContent(id_quiz * 1000 + i, "A", True),),
+            )
+            for i in range(questions)
+        ),
+    )
+
+
+def test_evicted_quizzes_no_longer_map_their_questions():
+    # each quiz weighs 1 + 2 * 3 = 7 options, so two fit
+    backend = LocalQuizCacheBackend(max_weight=14)
+    for id_quiz in range(1, 11):
+        backend.set(quiz(id_quiz, 3))
+
+    assert backend.get(1) is None
+    assert [backend.quiz_of_question(100 + i) for i in range(3)] == [None] * 3
+    assert backend.get(10) is not None
+    assert [backend.quiz_of_question(1000 + i) for i in range(3)] == [10] * 3
+
+
+def test_deleted_and_cleared_quizzes_no_longer_map_their_questions():
+    backend = LocalQuizCacheBackend(max_weight=100)
+    backend.set(quiz(1, 2))
+    backend.set(quiz(2, 2))
+
+    backend.delete(1)
+    assert backend.quiz_of_question(100) is None
+    assert backend.quiz_of_question(200) == 2
+
+    backend.clear()
+    assert backend.quiz_of_question(200) is None
+
+
+async def read_quiz(id_quiz: int) -> QuizContent:
+    # a session of its own, so nothing comes from the writer's identity map
+    async with db.async_session() as reader:
+        return await quiz_content_cache.get(reader, id_quiz)
+
+
+@pytest.mark.anyio
+async def test_hit_is_served_without_queries(session):
+    owner = await create_user(session, "owner")
+    course = await create_course(session, owner)
+    created, _, _ = await create_quiz(session, course, 3)
+    await session.commit()
+
+    first = await read_quiz(created.id_quiz)
+    hits = quiz_content_cache.hits
+    with count_queries() as queries:
+        second = await read_quiz(created.id_quiz)
+
+    assert second == first
+    assert quiz_content_cache.hits == hits + 1
+    assert queries.count == 0
+
+
+@pytest.mark.anyio
+async def test_committed_question_edit_invalidates(session):
+    owner = await create_user(session, "owner")
+    course = await create_course(session, owner)
+    created, questions, _ = await create_quiz(session, course, 3)
+    await session.commit()
+    await read_quiz(created.id_quiz)
+
+    questions[1].title = "Reworded"
+    await session.commit()
+
+    content = await read_quiz(created.id_quiz)
+    assert [q.title for q in content.questions] == ["Q0", "Reworded", "Q2"]
+
+
+@pytest.mark.anyio
+async def test_committed_option_edit_invalidates(session):
+    owner = await create_user(session, "owner")
+    course = await create_course(session, owner)
+    created, _, options = await create_quiz(session, course, 3)
+    await session.commit()
+    await read_quiz(created.id_quiz)
+
+    # options carry no quiz id; the cache maps their question back to it
+    options[2][0].is_correct = False
+    options[2][3].is_correct = True
+    await session.commit()
+
+    content = await read_quiz(created.id_quiz)
+    correct = content.correct_options()
+    assert correct[options[2][0].id_question] == {options[2][3].id_answer_option}
+
+
+@pytest.mark.anyio
+async def test_uncommitted_edit_keeps_the_cached_content(session):
+    owner = await create_user(session, "owner")
+    course = await create_course(session, owner)
+    created, questions, _ = await create_quiz(session, course, 3)
+    await session.commit()
+    # rollback expires `created` too
+    id_quiz = created.id_quiz
+    cached = await read_quiz(id_quiz)
+
+    questions[0].title = "Draft"
+    await session.flush()
+    await session.rollback()
+
+    assert await read_quiz(id_quiz) is cached